@@ -1,33 +1,80 @@
 import warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, status
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, status, WebSocket, WebSocketDisconnect, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse, JSONResponse, Response, PlainTextResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.concurrency import run_in_threadpool
 import speech_recognition as sr
-from gtts import gTTS
 import os
-import tempfile
 import threading
 import asyncio
-import cv2
-import numpy as np
-from graph import graph, get_llm, get_qdrant
+import json
+import time
+from contextlib import asynccontextmanager
+from graph import get_graph, get_llm, get_qdrant, astream_reply, SYSTEM_PROMPT
 from dotenv import load_dotenv
-from pydub import AudioSegment
-import io
+from typing import List
 from auth import (
-    Token, UserCreate, User, get_current_active_user, 
-    create_access_token, get_password_hash, verify_password, 
-    users_collection, ACCESS_TOKEN_EXPIRE_MINUTES
+    Token, UserCreate, User, get_current_user, get_current_active_user, 
+    create_access_token, get_users_collection, ACCESS_TOKEN_EXPIRE_MINUTES, get_user, warm_up_mongo, principals,
+    hash_password, check_password, rehash_if_outdated, hashing, HashBusy
 )
+from pymongo.errors import DuplicateKeyError
 from datetime import timedelta
-from mem0 import Memory
+from audio_pipeline import prepare_audio, AudioTooShort
+from speech import recognition
+from voice_stream import UtteranceSegmenter
+from tts import synthesize_speech, SentencePipeline, tts_cache
+from media import media_response, not_modified
+import vision_pool
+from vision_pool import PoolBusy, analyze_frame_async, analyze_batch_async
+from tracking import FaceTracker, trackers
+from memory_queue import MemoryWriter, MemoryQueueFull
+from memory_cache import MemoryCache
+from memory_store import get_memory, embedding_stats
+from startup import Readiness
+from timing import Timeline
+import metrics
+from metrics import record_error
+from context import ContextBudgeter, TurnContext
 
 load_dotenv()
 
-app = FastAPI()
+# Clients and models warmed concurrently at startup; /ready reports on them
+readiness = Readiness()
+
+def warm_up_asr():
+    # Local ASR engines load their model once per worker, before the first request
+    if hasattr(recognition.engine, "warm_up"):
+        recognition.engine.warm_up()
+
+# Parse the Haar cascades up front on every detection thread instead of on each one's first frame
+readiness.register("cascades", vision_pool.warm_up_threads)
+# Worker processes load their own copies; no-op without VISION_WORKERS
+readiness.register("vision_workers", vision_pool.wait_for_workers)
+readiness.register("mongo", warm_up_mongo)
+readiness.register("qdrant", get_qdrant)
+readiness.register("memory", get_memory)
+readiness.register("llm", lambda: (get_llm(), get_graph()))
+readiness.register("asr", warm_up_asr)
+# Canned replies need gTTS (network); the app can serve without them
+readiness.register("tts", tts_cache.warm_up, required=False)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    vision_pool.start_pool()
+    memory_writer.start()
+    # Serve (and answer /health) right away; /ready turns true once warm-up is done
+    app.state.warm_up = asyncio.create_task(readiness.warm_up())
+    yield
+    app.state.warm_up.cancel()
+    vision_pool.stop_pool()
+    # Flush queued memory writes so no turns are lost on restart
+    await run_in_threadpool(memory_writer.drain)
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -36,96 +83,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the browser's audio element read range/caching headers cross-origin
+    expose_headers=["Content-Range", "Accept-Ranges", "ETag", "Content-Length"],
 )
 
-# Initialize Qdrant client
-qdrant_client = get_qdrant()
-
-# Initialize Mem0 with Gemini embeddings and Qdrant Cloud vector store
-config = {
-    "llm": {
-        "provider": "gemini",
-        "config": {
-            "model": "gemini-2.5-flash",
-            "temperature": 0.7
-        }
-    },
-    "embedder": {
-        "provider": "gemini",
-        "config": {
-            "model": "models/text-embedding-004"
-        }
-    },
-    "vector_store": {
-        "provider": "qdrant",
-        "config": {
-            "collection_name": "avacare_memories_v4",
-            "url": os.getenv("QDRANT_URL"),
-            "api_key": os.getenv("QDRANT_API_KEY"),
-            "embedding_model_dims": 768  # Gemini text-embedding-004 uses 768 dimensions
-        }
-    }
-}
-memory = Memory.from_config(config)
-
 # Global state (still needed for face detection context, though per-user would be better)
 current_expression = {"expression": "Neutral", "detected": False}
 expression_lock = threading.Lock()
 
-# ... (Keep face detection logic as is for now, or move to a separate file if it gets too big)
-# For brevity, I'm keeping the existing face detection functions but cleaning up the file structure.
+# Upper bound on frames accepted by /detect-face/batch
+MAX_BATCH_FRAMES = int(os.getenv("MAX_BATCH_FRAMES", "32"))
+# Smallest confidence change the detection stream reports to the client
+STREAM_CONFIDENCE_DELTA = float(os.getenv("STREAM_CONFIDENCE_DELTA", "0.05"))
+# A turn answers without memories rather than wait longer than this for them
+MEMORY_SEARCH_TIMEOUT_SECONDS = float(os.getenv("MEMORY_SEARCH_TIMEOUT_SECONDS", "1.5"))
+# Send stage timings as a Server-Timing header on every response; clients can
+# also ask for it per request with "X-Server-Timing: 1"
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
 
-def detect_expression_from_face(face_gray, face_color):
-    """
-    Enhanced expression detection based on multiple facial features.
-    """
-    # ... (Same implementation as before, abbreviated for this tool call to avoid huge token usage if unchanged)
-    # I will assume the user wants the FULL file content if I replace the whole file. 
-    # Since I cannot see the full content in my head without reading it again, I will copy the logic from the previous view_file.
-    # actually, I should probably just import it or keep it.
-    # To be safe and clean, I will keep the logic but just paste it back.
-    
-    eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
-    smile_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_smile.xml')
-    
-    eyes = eye_cascade.detectMultiScale(face_gray, scaleFactor=1.1, minNeighbors=15, minSize=(15, 15))
-    smile_high = smile_cascade.detectMultiScale(face_gray, scaleFactor=1.5, minNeighbors=12, minSize=(20, 20))
-    smile_medium = smile_cascade.detectMultiScale(face_gray, scaleFactor=1.3, minNeighbors=8, minSize=(15, 15))
-    smile_low = smile_cascade.detectMultiScale(face_gray, scaleFactor=1.2, minNeighbors=5, minSize=(10, 10))
-    
-    brightness = np.mean(face_gray)
-    height, width = face_gray.shape
-    upper_face = face_gray[0:int(height*0.5), :]
-    lower_face = face_gray[int(height*0.5):, :]
-    middle_face = face_gray[int(height*0.3):int(height*0.7), :]
-    lower_third = face_gray[int(height*0.66):, :]
-    eyes_loose = eye_cascade.detectMultiScale(face_gray, scaleFactor=1.2, minNeighbors=8, minSize=(10, 10))
-    
-    num_eyes = len(eyes)
-    num_smiles_high = len(smile_high)
-    num_smiles_medium = len(smile_medium)
-    num_smiles_low = len(smile_low)
-    has_weak_smile = len(smile_low) > 0
-    
-    upper_brightness = np.mean(upper_face)
-    lower_brightness = np.mean(lower_face)
-    middle_brightness = np.mean(middle_face)
-    lower_contrast = np.std(lower_third)
-    
-    if num_smiles_high > 0: return "Happy 😄", (0, 255, 0)
-    if num_smiles_medium > 0: return "Happy 😄", (0, 255, 0)
-    if num_smiles_low > 0 and num_eyes >= 1: return "Content 😊", (50, 255, 100)
-    if num_eyes < 2 and len(eyes_loose) >= 1: return "Sleepy 😴", (150, 150, 255)
-    if num_eyes == 0: return "Surprised 😮", (255, 200, 0)
-    
-    if num_eyes >= 2:
-        if upper_brightness < lower_brightness - 15: return "Thinking 🤔", (255, 150, 50)
-        if brightness < 75 or (upper_brightness < middle_brightness - 12): return "Serious 😐", (255, 100, 100)
-        if lower_contrast < 35 and 80 <= brightness <= 100: return "Sad 😢", (100, 100, 255)
-        if brightness < 85 and not has_weak_smile: return "Sad 😢", (100, 100, 255)
-        return "Neutral 😊", (200, 200, 200)
-    
-    return "Neutral 😊", (200, 200, 200)
+def add_server_timing(request: Request, response: Response, timeline: Timeline):
+    if SERVER_TIMING or request.headers.get("x-server-timing") == "1":
+        response.headers["Server-Timing"] = timeline.server_timing()
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Route template, not the raw path, so /audio/<hash> stays one series
+        route = request.scope.get("route")
+        metrics.request_seconds.observe(time.perf_counter() - start, method=request.method,
+                                        route=getattr(route, "path", "unmatched"), status=status_code)
 
 def get_expression_context(expression: str):
     if not expression: return ""
@@ -134,26 +126,175 @@ def get_expression_context(expression: str):
     # Let's keep it simple: The context is just the expression name.
     return f"\n[User Expression: {expression_clean}]"
 
-def store_memory_background(user_id: str, transcript: str, response_text: str):
-    """Store memory in background thread"""
+# Ranked, deduplicated, token-budgeted memory context per turn
+context_budgeter = ContextBudgeter(SYSTEM_PROMPT)
+
+# Background memory writes: bounded queue, several turns per user coalesced into one add()
+memory_cache = MemoryCache(get_memory)
+# A landed write makes the user's cached memories stale
+memory_writer = MemoryWriter(
+    lambda conversation, user_id: get_memory().add(conversation, user_id=user_id),
+    on_written=memory_cache.invalidate,
+)
+
+def extract_memories(memories):
+    """Flatten mem0 search/get_all output (dict with 'results' or a plain list) into memory dicts"""
+    if isinstance(memories, dict) and 'results' in memories:
+        memories = memories['results']
+    if not isinstance(memories, list):
+        return []
+    memory_list = []
+    for m in memories:
+        if isinstance(m, dict) and 'memory' in m:
+            if m['memory']:
+                memory_list.append(m)
+        elif isinstance(m, str):
+            memory_list.append({"memory": m})
+    return memory_list
+
+def build_user_message(transcript: str, expression: str) -> str:
+    # Remembered context goes in the system prompt (see ContextBudgeter); only the expression rides along here
+    expression_context = get_expression_context(expression)
+    if expression_context:
+        return f"Current expression: {expression_context}\n\nUser: {transcript}"
+    return transcript
+
+def graph_inputs(user_message: str, turn_context: TurnContext):
+    return {"messages": [{"role": "user", "content": user_message}], "system_prompt": turn_context.system_prompt}
+
+def run_graph(user_message: str, turn_context: TurnContext) -> str:
     try:
-        conversation = f"User: {transcript}\nAssistant: {response_text}"
-        result = memory.add(conversation, user_id=user_id)
+        print(f"[Graph] Input message: {user_message[:200]}...")
+        inputs = graph_inputs(user_message, turn_context)
+        
+        response_text = None
+        for event in get_graph().stream(inputs, stream_mode="values"):
+            if "messages" in event:
+                last_message = event["messages"][-1]
+                if hasattr(last_message, 'type') and last_message.type == "ai":
+                    response_text = last_message.content
+        
+        return response_text or "I am here for you."
     except Exception as e:
-        pass
+        record_error("graph", e)
+        return "I am here for you. How can I help you today?"
+
+def load_memories(user_id: str, transcript: str):
+    try:
+        return extract_memories(memory_cache.search(transcript, user_id=user_id))
+    except Exception as e:
+        record_error("memory_search", e)
+        return []
+
+def assemble_context(user_id: str, memories) -> TurnContext:
+    """Rank, dedupe and budget the user's memories into this turn's system prompt"""
+    turn_context = context_budgeter.assemble(user_id, memories)
+    report = turn_context.report()
+    print(f"[Context] {user_id}: {report['memories_used']} memories, {report['tokens_used']} tokens "
+          f"({report['tokens_saved']} saved, prefix {'reused' if report['prefix_cached'] else 'new'})")
+    return turn_context
+
+def store_turn(user_id: str, transcript: str, response_text: str):
+    # Store in Memory (BACKGROUND - don't wait)
+    try:
+        memory_writer.submit(user_id, transcript, response_text)
+    except MemoryQueueFull as e:
+        print(f"[Memory] Dropping turn for {user_id}: {e}")
+
+def complete_turn(user_id: str, transcript: str, response_text: str):
+    """Queue the memory write and synthesize the reply (blocking)"""
+    store_turn(user_id, transcript, response_text)
+    return {"response": response_text, "audio_url": synthesize_speech(response_text)}
+
+async def search_memory_bounded(user_id: str, transcript: str, timeline: Timeline, prefetch=None):
+    """
+    Transcript-dependent memory search, capped at MEMORY_SEARCH_TIMEOUT_SECONDS.
+
+    Waits for the user's prefetch first so the search hits the in-process
+    cache. A slow search is skipped and the turn continues without memories.
+    """
+    async def search():
+        if prefetch is not None:
+            await asyncio.shield(prefetch)
+        return await run_in_threadpool(load_memories, user_id, transcript)
+
+    try:
+        with timeline.span("memory_search"):
+            return await asyncio.wait_for(search(), MEMORY_SEARCH_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        print(f"[Memory] Search for {user_id} exceeded {MEMORY_SEARCH_TIMEOUT_SECONDS}s, answering without memories")
+        return []
+
+def start_memory_prefetch(user_id: str, timeline: Timeline):
+    """Warm the user's memory cache in the background while audio is decoded and recognized"""
+    return asyncio.create_task(timeline.timed("memory_prefetch", run_in_threadpool(memory_cache.prefetch, user_id)))
+
+async def respond_to_transcript(user_id: str, transcript: str, expression: str, timeline: Timeline, prefetch=None):
+    """Memory lookup, LLM reply, background memory write and TTS for one user turn"""
+    memories = await search_memory_bounded(user_id, transcript, timeline, prefetch)
+    turn_context = assemble_context(user_id, memories)
+    user_message = build_user_message(transcript, expression)
+    with timeline.span("llm"):
+        response_text = await run_in_threadpool(run_graph, user_message, turn_context)
+    with timeline.span("tts"):
+        reply = await run_in_threadpool(complete_turn, user_id, transcript, response_text)
+    return {**reply, "context": turn_context.report()}
+
+async def transcribe_upload(content: bytes, timeline: Timeline):
+    """
+    Decode and recognize an uploaded recording.
+
+    Returns (transcript, None), or (None, reply) with the early reply
+    /process-audio sends for too-short or silent uploads.
+    """
+    # Decode, normalize and trim silence in memory, off the event loop
+    try:
+        with timeline.span("decode"):
+            audio_data = await run_in_threadpool(prepare_audio, content)
+    except AudioTooShort:
+        return None, await early_reply("Audio too short. Please speak for at least 1 second.", "Audio too short")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid audio file: {e}")
+
+    # All candidate languages go out at once; the most confident transcript wins
+    try:
+        with timeline.span("asr"):
+            hypothesis = await recognition.recognize(audio_data)
+    except sr.RequestError as e:
+        raise HTTPException(status_code=500, detail=f"Speech recognition service error: {e}")
+
+    if not hypothesis:
+        return None, await early_reply("I couldn't detect any speech. Please speak clearly and try again.", "No speech detected")
+    return hypothesis.transcript, None
+
+async def early_reply(response: str, error: str):
+    # The text is one of the canned phrases, so its clip is already in the TTS cache
+    audio_url = await run_in_threadpool(synthesize_speech, response)
+    return {"transcript": "", "response": response, "audio_url": audio_url, "error": error}
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 @app.post("/auth/signup", response_model=Token)
 async def signup(user: UserCreate):
-    user_exists = await users_collection.find_one({"username": user.username})
+    users_collection = get_users_collection()
+    user_exists = await users_collection.find_one({"username": user.username}, {"_id": 1})
     if user_exists:
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    hashed_password = get_password_hash(user.password)
+    try:
+        hashed_password = await hash_password(user.password)
+    except HashBusy:
+        raise HTTPException(status_code=503, detail="Too many sign-ins in progress, please retry", headers={"Retry-After": "1"})
     user_dict = user.dict()
     user_dict["hashed_password"] = hashed_password
     del user_dict["password"]
     
-    await users_collection.insert_one(user_dict)
+    try:
+        await users_collection.insert_one(user_dict)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent signup for the same name
+        raise HTTPException(status_code=400, detail="Username already registered")
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -163,227 +304,284 @@ async def signup(user: UserCreate):
 
 @app.post("/auth/login", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = await users_collection.find_one({"username": form_data.username})
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    user = await get_user(form_data.username, with_password=True)
+    try:
+        valid = user is not None and await check_password(form_data.password, user.hashed_password)
+    except HashBusy:
+        raise HTTPException(status_code=503, detail="Too many sign-ins in progress, please retry", headers={"Retry-After": "1"})
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    try:
+        await rehash_if_outdated(user.username, form_data.password, user.hashed_password)
+    except Exception as e:
+        # The login itself succeeded; the upgrade is retried next time
+        print(f"[Auth] Could not upgrade password hash for {user.username}: {e}")
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["username"]}, expires_delta=access_token_expires
+        data={"sub": user.username}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+@app.get("/auth/cache")
+async def auth_cache_stats():
+    """Hit rate of the validated-token cache, plus password hashing queue times"""
+    return {**principals.stats(), "hashing": hashing.stats()}
+
 @app.get("/users/me", response_model=User)
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
 
 @app.post("/process-audio")
 async def process_audio(
+    request: Request,
+    response: Response,
     audio: UploadFile = File(...),
     expression: str = Form(""),
     expression_confidence: str = Form("0"),
     current_user: User = Depends(get_current_active_user)
 ):
+    timeline = Timeline("process-audio")
+    user_id = current_user.username
+    # Runs alongside decode + ASR; the transcript search later reads the warmed cache
+    prefetch = start_memory_prefetch(user_id, timeline)
     try:
-        content = await audio.read()
-        
-        # Convert to wav with enhanced processing
-        try:
-            audio_segment = AudioSegment.from_file(io.BytesIO(content))
-            
-            # Check if audio is too short
-            if audio_segment.duration_seconds < 0.5:
-                return {"transcript": "", "response": "Audio too short. Please speak for at least 1 second.", "error": "Audio too short"}
-            
-            # Normalize audio (increase volume if too quiet)
-            audio_segment = audio_segment.normalize()
-            
-            # Apply noise reduction by trimming silence
-            audio_segment = audio_segment.strip_silence(silence_len=200, silence_thresh=-50)
-            
-            # Export with optimal settings for speech recognition
-            wav_io = io.BytesIO()
-            audio_segment.export(
-                wav_io, 
-                format="wav",
-                parameters=["-ar", "16000", "-ac", "1"]  # 16kHz mono
-            )
-            wav_io.seek(0)
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_audio:
-                temp_audio.write(wav_io.read())
-                temp_audio_path = temp_audio.name
-        except Exception as e:
-            # Fallback: try using the original content if it might be wav already
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_audio:
-                temp_audio.write(content)
-                temp_audio_path = temp_audio.name
-
-        # Speech Recognition with enhanced settings
-        recognizer = sr.Recognizer()
-        # Adjust recognizer settings for better accuracy
-        recognizer.energy_threshold = 300  # Minimum audio energy to consider for recording
-        recognizer.dynamic_energy_threshold = True
-        recognizer.pause_threshold = 0.8  # Seconds of non-speaking audio before phrase is considered complete
-        
-        try:
-            with sr.AudioFile(temp_audio_path) as source:
-                # Adjust for ambient noise
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                audio_data = recognizer.record(source)
-        except Exception as e:
-             os.unlink(temp_audio_path)
-             raise HTTPException(status_code=400, detail=f"Invalid audio file: {e}")
-            
-        try:
-            # Try both languages with show_all to get more details
-            transcript = None
-            
-            # Try English first
-            try:
-                transcript = recognizer.recognize_google(
-                    audio_data, 
-                    language="en-US",
-                    show_all=False
-                )
-            except sr.UnknownValueError as e:
-                pass
-                
-            # If English failed, try Hindi
-            if not transcript:
-                try:
-                    transcript = recognizer.recognize_google(
-                        audio_data, 
-                        language="hi-IN",
-                        show_all=False
-                    )
-                except sr.UnknownValueError as e:
-                    pass
-                    
-            # If both failed, try with show_all=True to see if we get partial results
-            if not transcript:
-                try:
-                    result = recognizer.recognize_google(audio_data, language="en-US", show_all=True)
-                    if result and isinstance(result, dict) and 'alternative' in result:
-                        transcript = result['alternative'][0].get('transcript', '')
-                except Exception as e:
-                    pass
-                    
-            if not transcript:
-                os.unlink(temp_audio_path)
-                return {
-                    "transcript": "", 
-                    "response": "I couldn't detect any speech. Please speak clearly and try again.", 
-                    "error": "No speech detected"
-                }
-                
-        except sr.RequestError as e:
-            os.unlink(temp_audio_path)
-            raise HTTPException(status_code=500, detail=f"Speech recognition service error: {e}")
-        
-        os.unlink(temp_audio_path)
-        
-        # Retrieve Memory
-        user_id = current_user.username
-        memory_context = ""
-        try:
-            memories = memory.search(transcript, user_id=user_id)
-            
-            # Handle the response structure from mem0
-            if memories:
-                memory_list = []
-                
-                # Check if memories is a dict with 'results' key
-                if isinstance(memories, dict) and 'results' in memories:
-                    results = memories['results']
-                    for m in results:
-                        if isinstance(m, dict) and 'memory' in m:
-                            mem_text = m['memory']
-                            if mem_text:
-                                memory_list.append(mem_text)
-                        elif isinstance(m, str):
-                            memory_list.append(m)
-                # Handle list of memories
-                elif isinstance(memories, list):
-                    for m in memories:
-                        if isinstance(m, dict) and 'memory' in m:
-                            mem_text = m['memory']
-                            if mem_text:
-                                memory_list.append(mem_text)
-                        elif isinstance(m, str):
-                            memory_list.append(m)
-                
-                memory_context = "\n".join(memory_list)
-        except Exception as e:
-            pass
-        
-        expression_context = get_expression_context(expression)
-        
-        # Construct Message with context
-        context_parts = []
-        if memory_context:
-            context_parts.append(f"Previous conversation context:\n{memory_context}")
-        if expression_context:
-            context_parts.append(f"Current expression: {expression_context}")
-        
-        full_context = "\n\n".join(context_parts) if context_parts else ""
+        with timeline.span("upload"):
+            content = await audio.read()
+        transcript, early_reply = await transcribe_upload(content, timeline)
+        if early_reply:
+            return early_reply
         
-        # Run Graph
-        try:
-            if full_context:
-                user_message = f"{full_context}\n\nUser: {transcript}"
-            else:
-                user_message = transcript
-            
-            print(f"[Graph] Input message: {user_message[:200]}...")
-            inputs = {"messages": [{"role": "user", "content": user_message}]}
-            
-            response_text = None
-            for event in graph.stream(inputs, stream_mode="values"):
-                if "messages" in event:
-                    last_message = event["messages"][-1]
-                    if hasattr(last_message, 'type') and last_message.type == "ai":
-                        response_text = last_message.content
-            
-            if not response_text:
-                response_text = "I am here for you."
-        except Exception as e:
-            print(f"Graph processing error: {e}")
-            response_text = "I am here for you. How can I help you today?"
-            
-        # Store in Memory (BACKGROUND - don't wait)
-        threading.Thread(
-            target=store_memory_background,
-            args=(user_id, transcript, response_text),
-            daemon=True
-        ).start()
-        
-        # TTS
-        tts = gTTS(text=response_text, lang='en', slow=False)
-        audio_filename = f"response_{os.urandom(4).hex()}.mp3"
-        audio_path = os.path.join(tempfile.gettempdir(), audio_filename)
-        tts.save(audio_path)
+        reply = await respond_to_transcript(user_id, transcript, expression, timeline, prefetch)
         
         return {
             "transcript": transcript,
-            "response": response_text,
-            "audio_url": f"/audio/{audio_filename}",
+            **reply,
             "expression": expression,
-            "expression_confidence": float(expression_confidence)
+            "expression_confidence": float(expression_confidence),
+            "timings": timeline.summary()
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        timeline.log(user=user_id)
+        add_server_timing(request, response, timeline)
+
+@app.post("/process-audio/stream")
+async def process_audio_stream(
+    audio: UploadFile = File(...),
+    expression: str = Form(""),
+    expression_confidence: str = Form("0"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Same turn as /process-audio, streamed as server-sent events.
+
+    Emits "transcript", then one "delta" per chunk of LLM text as it is
+    generated. Each sentence is sent to TTS as soon as it is complete and its
+    clip is announced with an "audio" event, strictly in sentence order, so
+    playback can start after the first sentence. "done" closes the stream with
+    the full response, the ordered audio playlist and the time to first token.
+    """
+    timeline = Timeline("process-audio-stream")
+    user_id = current_user.username
+    prefetch = start_memory_prefetch(user_id, timeline)
+    with timeline.span("upload"):
+        content = await audio.read()
+    transcript, early_reply = await transcribe_upload(content, timeline)
+
+    async def events():
+        if early_reply:
+            yield sse_event("done", early_reply)
+            return
+        yield sse_event("transcript", {"transcript": transcript})
+
+        memories = await search_memory_bounded(user_id, transcript, timeline, prefetch)
+        turn_context = assemble_context(user_id, memories)
+        inputs = graph_inputs(build_user_message(transcript, expression), turn_context)
+
+        speech = SentencePipeline()
+        playlist = []
+        started = time.perf_counter()
+        first_token_ms = None
+        parts = []
+        fallback = "I am here for you."
+        # A client that disconnects at any yield below must not leave syntheses running
+        try:
+            try:
+                async for text in astream_reply(inputs):
+                    if first_token_ms is None:
+                        first_token_ms = round((time.perf_counter() - started) * 1000, 1)
+                    parts.append(text)
+                    yield sse_event("delta", {"text": text})
+                    speech.feed(text)
+                    for segment in speech.ready():
+                        playlist.append(segment.get("audio_url"))
+                        yield sse_event("audio", segment)
+            except Exception as e:
+                record_error("graph", e)
+                fallback = "I am here for you. How can I help you today?"
+            if not parts:
+                parts = [fallback]
+                yield sse_event("delta", {"text": fallback})
+                speech.feed(fallback)
+
+            speech.close()
+            async for segment in speech.drain():
+                playlist.append(segment.get("audio_url"))
+                yield sse_event("audio", segment)
+        finally:
+            speech.cancel()
+
+        response_text = "".join(parts)
+        store_turn(user_id, transcript, response_text)
+        yield sse_event("done", {
+            "transcript": transcript,
+            "response": response_text,
+            "audio_playlist": playlist,
+            "expression": expression,
+            "expression_confidence": float(expression_confidence),
+            "time_to_first_token_ms": first_token_ms,
+            "context": turn_context.report(),
+            "timings": timeline.summary(),
+        })
+        timeline.log(user=user_id, ttft_ms=first_token_ms)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.websocket("/ws/voice")
+async def voice_stream(websocket: WebSocket, token: str = "", expression: str = ""):
+    """
+    Streaming voice turns.
+
+    The client sends raw 16 kHz mono PCM16 chunks as binary messages while the
+    user speaks, authenticating with ?token=. Text messages are JSON controls:
+    {"type": "expression", "expression": ...} updates the current expression and
+    {"type": "end"} closes the utterance without waiting for silence.
+
+    The server pushes {"type": "partial"} transcripts during speech, then
+    {"type": "transcript"} and {"type": "response"} (same fields as
+    /process-audio) once end-of-speech is detected.
+    """
+    try:
+        user = await get_current_active_user(await get_current_user(token))
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    segmenter = UtteranceSegmenter()
+    current = {"expression": expression, "partial": None}
+    turns = set()
+    # Warm the memory cache while the user is still talking
+    prefetch = start_memory_prefetch(user.username, Timeline("voice-prefetch"))
+
+    async def send_partial(audio_data):
+        try:
+            hypothesis = await recognition.recognize(audio_data)
+        except sr.RequestError:
+            return
+        if hypothesis:
+            await websocket.send_json({"type": "partial", "transcript": hypothesis.transcript})
+
+    async def run_turn(audio_data, turn_expression, timeline):
+        try:
+            with timeline.span("asr"):
+                hypothesis = await recognition.recognize(audio_data)
+        except sr.RequestError as e:
+            await websocket.send_json({"type": "error", "error": f"Speech recognition service error: {e}"})
+            return
+        if not hypothesis:
+            await websocket.send_json({"type": "error", "error": "No speech detected"})
+            return
+        transcript = hypothesis.transcript
+        await websocket.send_json({"type": "transcript", "transcript": transcript})
+        reply = await respond_to_transcript(user.username, transcript, turn_expression, timeline, prefetch)
+        await websocket.send_json({"type": "response", "transcript": transcript, **reply,
+                                   "expression": turn_expression, "timings": timeline.summary()})
+
+    async def finish_turn(audio_data, turn_expression):
+        # A background task: anything it raises would otherwise vanish and leave the client waiting
+        timeline = Timeline("voice-turn")
+        try:
+            await run_turn(audio_data, turn_expression, timeline)
+        except Exception as e:
+            record_error("voice_turn", e)
+            try:
+                await websocket.send_json({"type": "error", "error": str(e)})
+            except Exception:
+                # The socket is gone; the main loop cleans up
+                pass
+        finally:
+            timeline.log(user=user.username)
+
+    def end_utterance():
+        if current["partial"] is not None:
+            current["partial"].cancel()
+            current["partial"] = None
+        if segmenter.has_enough_speech():
+            # The graph starts as soon as speech ends; audio for the next turn keeps flowing in
+            turn = asyncio.create_task(finish_turn(segmenter.utterance(), current["expression"]))
+            turns.add(turn)
+            turn.add_done_callback(turns.discard)
+        segmenter.reset()
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    control = None
+                if not isinstance(control, dict):
+                    await websocket.send_json({"type": "error", "error": "Control messages must be JSON objects"})
+                    continue
+                if control.get("type") == "expression":
+                    current["expression"] = control.get("expression", "")
+                elif control.get("type") == "end" and segmenter.in_speech:
+                    end_utterance()
+                continue
+
+            event = segmenter.feed(message.get("bytes") or b"")
+            while event == "final":
+                end_utterance()
+                event = segmenter.feed(b"")
+            if event == "partial" and (current["partial"] is None or current["partial"].done()):
+                current["partial"] = asyncio.create_task(send_partial(segmenter.utterance()))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in [current["partial"], prefetch, *turns]:
+            if task is not None:
+                task.cancel()
 
 @app.get("/audio/{filename}")
-async def get_audio(filename: str):
-    audio_path = os.path.join(tempfile.gettempdir(), filename)
-    if not os.path.exists(audio_path):
+async def get_audio(filename: str, request: Request):
+    if filename not in tts_cache:
         raise HTTPException(status_code=404, detail="Audio file not found")
-    return FileResponse(audio_path, media_type="audio/mpeg")
+    # Clip names are content hashes, so a revalidation is answered without reading the clip
+    etag = f'"{filename.rsplit(".", 1)[0]}"'
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    # Recently generated clips come from RAM; older ones are read from the cache dir
+    data = await run_in_threadpool(tts_cache.read, filename)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Audio file not found")
+    return media_response(request, data, etag, "audio/mpeg")
+
+@app.get("/audio-cache/stats")
+async def audio_cache_stats():
+    """TTS cache size and hit/miss counters"""
+    return tts_cache.stats()
 
 @app.get("/memories/all")
 async def get_all_memories(current_user: User = Depends(get_current_active_user)):
@@ -391,7 +589,7 @@ async def get_all_memories(current_user: User = Depends(get_current_active_user)
     try:
         user_id = current_user.username
         # Get all memories for the user
-        memories = memory.get_all(user_id=user_id)
+        memories = await run_in_threadpool(lambda: get_memory().get_all(user_id=user_id))
         print(f"[Memory Debug] Retrieved {len(memories) if memories else 0} memories for user {user_id}")
         return {"user_id": user_id, "memories": memories, "count": len(memories) if memories else 0}
     except Exception as e:
@@ -406,7 +604,8 @@ async def add_test_memory(current_user: User = Depends(get_current_active_user))
     try:
         user_id = current_user.username
         test_message = f"User: My name is {user_id}\nAssistant: Nice to meet you, {user_id}! I'll remember your name."
-        result = memory.add(test_message, user_id=user_id)
+        result = await run_in_threadpool(lambda: get_memory().add(test_message, user_id=user_id))
+        memory_cache.invalidate(user_id)
         print(f"[Memory Test] Added test memory for {user_id}: {result}")
         return {"message": "Test memory added", "result": result}
     except Exception as e:
@@ -415,6 +614,16 @@ async def add_test_memory(current_user: User = Depends(get_current_active_user))
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/context/stats")
+async def context_stats():
+    """Token budget, tokens saved by budgeting and prompt-prefix reuse across turns"""
+    return context_budgeter.stats()
+
+@app.get("/memories/queue")
+async def memory_queue_stats():
+    """Depth, throughput and write latency of the background memory writer, plus retrieval and embedding cache counters"""
+    return {**memory_writer.stats(), "cache": memory_cache.stats(), "embeddings": embedding_stats()}
+
 @app.delete("/memories/clear")
 async def clear_memories(current_user: User = Depends(get_current_active_user)):
     """Clear all memories for the current user"""
@@ -426,43 +635,129 @@ async def clear_memories(current_user: User = Depends(get_current_active_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/detect-face")
-async def detect_face(image: UploadFile = File(...)):
-    # ... (Same as before)
-    # I'll just return a simplified version or the same logic.
-    # To save space, I'll copy the logic from the previous file view.
+async def detect_face(request: Request, response: Response, image: UploadFile = File(...), session_id: str = Form("")):
+    # Spans feed the stage histograms only; a log line per frame would drown everything else
+    timeline = Timeline("detect-face")
     try:
-        image_data = await image.read()
-        nparr = np.frombuffer(image_data, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        if frame is None: return {"face_detected": False, "expression": "Neutral 😊", "confidence": 0.0, "color": [200, 200, 200]}
-        
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(50, 50))
-        
-        if len(faces) == 0: return {"face_detected": False, "expression": "Neutral 😊", "confidence": 0.0, "color": [200, 200, 200]}
-        
-        x, y, w, h = faces[0]
-        face_gray = gray[y:y+h, x:x+w]
-        face_color = frame[y:y+h, x:x+w]
-        
-        expression_with_emoji, color_bgr = detect_expression_from_face(face_gray, face_color)
-        confidence = min((w * h) / (gray.shape[0] * gray.shape[1]) * 5, 1.0)
-        
-        return {
-            "face_detected": True,
-            "expression": expression_with_emoji,
-            "confidence": round(confidence, 2),
-            "color": [color_bgr[2], color_bgr[1], color_bgr[0]],
-            "face_dimensions": {"x": int(x), "y": int(y), "width": int(w), "height": int(h)}
-        }
+        with timeline.span("upload"):
+            image_data = await image.read()
+        # With a session id, frames between keyframes only search around the last face
+        tracker = trackers.get(session_id) if session_id else None
+        # Decoding and the cascade passes are blocking, keep them off the event loop
+        with timeline.span("analyze"):
+            return await analyze_frame_async(image_data, tracker)
+    except PoolBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
+        record_error("detect_face", e)
         return {"face_detected": False, "error": str(e)}
+    finally:
+        add_server_timing(request, response, timeline)
+
+@app.post("/detect-face/batch")
+async def detect_face_batch(images: List[UploadFile] = File(...)):
+    """Detect faces in several frames (from one user or many) in a single request"""
+    if len(images) > MAX_BATCH_FRAMES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FRAMES} frames per batch")
+    blobs = [await image.read() for image in images]
+    try:
+        return await analyze_batch_async(blobs)
+    except PoolBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+def expression_changed(previous, result):
+    """True when a stream result is worth pushing to the client"""
+    if previous is None:
+        return True
+    if previous.get("face_detected") != result.get("face_detected"):
+        return True
+    if previous.get("expression") != result.get("expression"):
+        return True
+    return abs(previous.get("confidence", 0.0) - result.get("confidence", 0.0)) >= STREAM_CONFIDENCE_DELTA
+
+@app.websocket("/ws/detect-face")
+async def detect_face_stream(websocket: WebSocket):
+    """
+    Streaming variant of /detect-face.
+
+    The client sends encoded frames as binary messages. Only the newest frame is
+    processed; frames that arrive while detection is busy replace the pending one
+    and are counted as dropped. Results are pushed only when the label or the
+    confidence moves.
+    """
+    await websocket.accept()
+    pending = {"frame": None, "dropped": 0}
+    frame_ready = asyncio.Event()
+    tracker = FaceTracker()
+
+    async def process_frames():
+        last_sent = None
+        while True:
+            await frame_ready.wait()
+            frame_ready.clear()
+            data, pending["frame"] = pending["frame"], None
+            if data is None:
+                continue
+            try:
+                result = await analyze_frame_async(data, tracker)
+            except PoolBusy:
+                # Workers are saturated; this frame is simply dropped like a stale one
+                pending["dropped"] += 1
+                continue
+            except Exception as e:
+                result = {"face_detected": False, "error": str(e)}
+            if expression_changed(last_sent, result):
+                await websocket.send_json({**result, "dropped_frames": pending["dropped"]})
+                last_sent = result
+
+    worker = asyncio.create_task(process_frames())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            data = message.get("bytes")
+            if not data:
+                continue
+            if pending["frame"] is not None:
+                pending["dropped"] += 1
+            pending["frame"] = data
+            frame_ready.set()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        worker.cancel()
+
+@app.get("/vision/stats")
+async def vision_stats():
+    """Vision worker pool occupancy and per-worker counters"""
+    if vision_pool.pool is None:
+        return {"workers": 0}
+    return vision_pool.pool.stats()
+
+# Point-in-time values next to the histograms and counters
+metrics.registry.gauge("avacare_memory_queue_depth", "Conversation turns waiting to be written to memory",
+                       lambda: memory_writer.stats()["queue_depth"])
+metrics.registry.gauge("avacare_password_jobs_pending", "Password hashes queued or running",
+                       lambda: hashing.stats()["pending"])
+metrics.registry.gauge("avacare_ready", "1 once every required component has warmed up",
+                       lambda: int(readiness.ready()))
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Stage latency histograms, request durations and error counters in Prometheus text format"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def ready_check():
+    """200 once every required component has warmed up, else 503; per-component status and timings either way"""
+    report = readiness.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,93 @@
+import io
+import numpy as np
+import speech_recognition as sr
+from pydub import AudioSegment
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+MIN_DURATION_SECONDS = 0.5
+# Same settings process_audio used with pydub's normalize()/strip_silence()
+NORMALIZE_HEADROOM_DB = 0.1
+SILENCE_LEN_MS = 200
+SILENCE_THRESH_DBFS = -50
+SILENCE_PADDING_MS = 100
+INT16_FULL_SCALE = 32768
+
+
+class AudioTooShort(Exception):
+    """Upload decoded fine but is shorter than MIN_DURATION_SECONDS"""
+
+
+def decode_pcm(content: bytes) -> np.ndarray:
+    """Decode an upload straight to 16 kHz mono int16 samples (ffmpeg reads and writes through pipes)"""
+    segment = AudioSegment.from_file(io.BytesIO(content), parameters=["-ar", str(SAMPLE_RATE), "-ac", "1"])
+    segment = segment.set_frame_rate(SAMPLE_RATE).set_channels(1).set_sample_width(SAMPLE_WIDTH)
+    return np.frombuffer(segment.raw_data, dtype=np.int16)
+
+
+def normalize(samples: np.ndarray, headroom_db: float = NORMALIZE_HEADROOM_DB) -> np.ndarray:
+    """Scale so the peak sits headroom_db below full scale (pydub's normalize)"""
+    if samples.size == 0:
+        return samples
+    peak = np.abs(samples.astype(np.int32)).max()
+    if peak == 0:
+        return samples
+    gain = INT16_FULL_SCALE * 10 ** (-headroom_db / 20) / peak
+    return np.clip(np.rint(samples * gain), -INT16_FULL_SCALE, INT16_FULL_SCALE - 1).astype(np.int16)
+
+
+def strip_silence(samples: np.ndarray, silence_len: int = SILENCE_LEN_MS,
+                  silence_thresh: float = SILENCE_THRESH_DBFS, padding: int = SILENCE_PADDING_MS) -> np.ndarray:
+    """
+    Drop silent stretches the way pydub's strip_silence does, without the per-window loop.
+
+    A millisecond is silent when it falls inside any silence_len window whose RMS
+    is at or below silence_thresh dBFS; speech keeps padding ms on either side.
+    """
+    per_ms = SAMPLE_RATE // 1000
+    n_ms = len(samples) // per_ms
+    if n_ms < silence_len:
+        return samples
+
+    frames = samples[:n_ms * per_ms].astype(np.float64).reshape(n_ms, per_ms)
+    energy = np.concatenate(([0.0], np.cumsum(np.einsum("ij,ij->i", frames, frames))))
+    window_rms = np.sqrt((energy[silence_len:] - energy[:-silence_len]) / (silence_len * per_ms))
+    silent_start = window_rms <= INT16_FULL_SCALE * 10 ** (silence_thresh / 20)
+
+    # Spread every silent window over the silence_len milliseconds it covers
+    coverage = np.zeros(n_ms + 1, dtype=np.int32)
+    starts = np.flatnonzero(silent_start)
+    np.add.at(coverage, starts, 1)
+    np.add.at(coverage, starts + silence_len, -1)
+    speech = np.cumsum(coverage[:n_ms]) == 0
+    if not speech.any():
+        return samples[:0]
+
+    # Grow each speech run by padding ms on both sides
+    runs = np.concatenate(([0], np.cumsum(speech)))
+    idx = np.arange(n_ms)
+    keep = runs[np.minimum(idx + padding + 1, n_ms)] - runs[np.maximum(idx - padding, 0)] > 0
+
+    mask = np.repeat(keep, per_ms)
+    # Trailing partial millisecond follows the last full one
+    mask = np.concatenate((mask, np.full(len(samples) - len(mask), keep[-1])))
+    return samples[mask]
+
+
+def prepare_audio(content: bytes) -> sr.AudioData:
+    """
+    Turn an uploaded recording into recognizer input entirely in memory.
+
+    Raises AudioTooShort for clips under MIN_DURATION_SECONDS. Uploads pydub
+    cannot decode are handed to speech_recognition as-is in case they are WAV.
+    """
+    try:
+        samples = decode_pcm(content)
+    except Exception:
+        with sr.AudioFile(io.BytesIO(content)) as source:
+            return sr.Recognizer().record(source)
+
+    if len(samples) < MIN_DURATION_SECONDS * SAMPLE_RATE:
+        raise AudioTooShort()
+    samples = strip_silence(normalize(samples))
+    return sr.AudioData(samples.tobytes(), SAMPLE_RATE, SAMPLE_WIDTH)
@@ -1,5 +1,10 @@
 from datetime import datetime, timedelta
 from typing import Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
@@ -17,11 +22,30 @@ SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+# How long a validated token skips the user lookup (never past the token's own expiry)
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
 
-# Database Setup
-client = AsyncIOMotorClient(MONGODB_URL)
-db = client.avacare
-users_collection = db.users
+# bcrypt cost for new hashes; stored hashes below it are upgraded at the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads hashing/verifying passwords; each bcrypt call holds one for ~100+ ms
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+# Hash jobs waiting or running before new logins/signups are turned away with 503
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "64"))
+
+# Fields a principal needs; the password hash is only read at login
+USER_PROJECTION = {"_id": 0, "username": 1, "email": 1, "full_name": 1, "disabled": 1}
+
+# Database Setup (connected on first use, not at import)
+client = None
+users_collection = None
+
+def get_users_collection():
+    global client, users_collection
+    if users_collection is None:
+        client = AsyncIOMotorClient(MONGODB_URL)
+        users_collection = client.avacare.users
+    return users_collection
 
 # OAuth2
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -63,9 +87,92 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 def get_password_hash(password: str) -> str:
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
+def needs_rehash(hashed_password: str) -> bool:
+    """True for non-bcrypt schemes, older bcrypt variants and costs below BCRYPT_ROUNDS"""
+    parts = hashed_password.split('$')
+    if len(parts) < 4 or parts[1] != '2b':
+        return True
+    try:
+        return int(parts[2]) < BCRYPT_ROUNDS
+    except ValueError:
+        return True
+
+
+class HashBusy(Exception):
+    """HASH_MAX_PENDING password jobs are already queued"""
+
+
+class HashingExecutor:
+    """
+    Runs bcrypt off the event loop on a small dedicated thread pool.
+
+    At most workers hashes run at once; up to max_pending may wait, beyond
+    that run() raises HashBusy. Time spent queued and hashing is recorded so
+    login storms show up in stats().
+    """
+
+    def __init__(self, workers=HASH_WORKERS, max_pending=HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.metrics = {"jobs": 0, "rejected": 0, "queue_seconds_total": 0.0, "queue_seconds_max": 0.0,
+                        "run_seconds_total": 0.0, "run_seconds_max": 0.0}
+
+    def _timed(self, submitted, fn, args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self.metrics["jobs"] += 1
+                self.metrics["queue_seconds_total"] += started - submitted
+                self.metrics["queue_seconds_max"] = max(self.metrics["queue_seconds_max"], started - submitted)
+                self.metrics["run_seconds_total"] += finished - started
+                self.metrics["run_seconds_max"] = max(self.metrics["run_seconds_max"], finished - started)
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.metrics["rejected"] += 1
+                raise HashBusy(f"{self._pending} password jobs pending")
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, time.perf_counter(), fn, args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self):
+        with self._lock:
+            jobs = self.metrics["jobs"]
+            return {**self.metrics, "workers": self.workers, "pending": self._pending,
+                    "queue_seconds_avg": self.metrics["queue_seconds_total"] / jobs if jobs else 0.0,
+                    "run_seconds_avg": self.metrics["run_seconds_total"] / jobs if jobs else 0.0}
+
+
+hashing = HashingExecutor()
+
+async def hash_password(password: str) -> str:
+    return await hashing.run(get_password_hash, password)
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    return await hashing.run(verify_password, plain_password, hashed_password)
+
+async def rehash_if_outdated(username: str, plain_password: str, hashed_password: str):
+    """Store a current-cost bcrypt hash for a user who just proved their password"""
+    if not needs_rehash(hashed_password):
+        return
+    new_hash = await hash_password(plain_password)
+    await get_users_collection().update_one({"username": username, "hashed_password": hashed_password},
+                                      {"$set": {"hashed_password": new_hash}})
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -76,18 +183,117 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_user(username: str):
-    user_dict = await users_collection.find_one({"username": username})
+class PrincipalCache:
+    """
+    TTL/LRU cache of validated users keyed by bearer token.
+
+    An entry lives for ttl seconds or until its JWT expires, whichever is
+    first. invalidate_user() drops every token of a user, so disabling or
+    editing an account takes effect on their next request.
+    """
+
+    def __init__(self, ttl=PRINCIPAL_CACHE_TTL_SECONDS, max_entries=PRINCIPAL_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tokens_by_user = {}
+        # Bumped by invalidate_user(), so a load that started before a write is not cached
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _drop(self, token):
+        user, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(user.username)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user.username]
+
+    def get(self, token: str):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self._entries.move_to_end(token)
+                    self.counters["hits"] += 1
+                    return entry[0]
+                self._drop(token)
+            self.counters["misses"] += 1
+            return None
+
+    def generation(self, username: str):
+        """Read before loading a user; pass to put() to skip the entry if the user changed meanwhile"""
+        with self._lock:
+            return self._generations.get(username, 0)
+
+    def put(self, token: str, user: User, token_expires_at: Optional[float] = None, generation: Optional[int] = None):
+        expires = time.monotonic() + self.ttl
+        if token_expires_at is not None:
+            expires = min(expires, time.monotonic() + token_expires_at - time.time())
+        with self._lock:
+            if generation is not None and self._generations.get(user.username, 0) != generation:
+                # Invalidated while loading: the caller still gets this user, the next request reloads
+                return
+            if token in self._entries:
+                self._drop(token)
+            self._entries[token] = (user, expires)
+            self._tokens_by_user.setdefault(user.username, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, username: str):
+        with self._lock:
+            self._generations[username] = self._generations.get(username, 0) + 1
+            for token in list(self._tokens_by_user.get(username, ())):
+                self._drop(token)
+            self.counters["invalidations"] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {**self.counters, "entries": len(self._entries), "users": len(self._tokens_by_user),
+                    "hit_rate": self.counters["hits"] / lookups if lookups else 0.0}
+
+
+principals = PrincipalCache()
+
+async def ensure_indexes():
+    """Unique username index: backs every lookup below and stops duplicate signups"""
+    await get_users_collection().create_index("username", unique=True)
+
+async def warm_up_mongo():
+    """Connect to Mongo and make sure the username index exists"""
+    await get_users_collection().database.client.admin.command("ping")
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        # Duplicate usernames already stored; lookups still work without it
+        print(f"[Auth] Could not create the username index: {e}")
+
+async def get_user(username: str, with_password: bool = False):
+    projection = {**USER_PROJECTION, "hashed_password": 1} if with_password else USER_PROJECTION
+    user_dict = await get_users_collection().find_one({"username": username}, projection)
     if user_dict:
-        return UserInDB(**user_dict)
+        return UserInDB(**user_dict) if with_password else User(**user_dict)
     return None
 
+async def update_user(username: str, changes: dict):
+    """Apply changes to a stored user (e.g. {"disabled": True}) and drop their cached sessions"""
+    result = await get_users_collection().update_one({"username": username}, {"$set": changes})
+    principals.invalidate_user(username)
+    return result.modified_count
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    # Only tokens that already passed validation are cached
+    user = principals.get(token)
+    if user is not None:
+        return user
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -97,9 +303,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise credentials_exception
     
+    generation = principals.generation(token_data.username)
     user = await get_user(username=token_data.username)
     if user is None:
         raise credentials_exception
+    principals.put(token, user, payload.get("exp"), generation)
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
@@ -0,0 +1,75 @@
+"""
+Compare ASR engines on fixture WAVs: real-time factor and latency percentiles.
+
+    python benchmarks/asr_engines.py clip1.wav clip2.wav ... [--engines google whisper] [--language en-US]
+
+RTF is processing time divided by audio duration (below 1.0 is faster than
+real time). The google engine needs network access; whisper needs
+faster-whisper and downloads the ASR_WHISPER_MODEL weights on first use.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+import speech
+
+
+def load_clips(paths):
+    clips = []
+    for path in paths:
+        with sr.AudioFile(path) as source:
+            audio_data = sr.Recognizer().record(source)
+        duration = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+        clips.append((path, audio_data, duration))
+    return clips
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(int(len(values) * fraction) - 1, 0)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("clips", nargs="+")
+    parser.add_argument("--engines", nargs="+", default=sorted(speech.ENGINES))
+    parser.add_argument("--language", default="en-US")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    clips = load_clips(args.clips)
+    total_audio = sum(duration for _, _, duration in clips)
+    print(f"{len(clips)} clip(s), {total_audio:.1f} s of audio, {args.runs} run(s)")
+
+    for name in args.engines:
+        engine = speech.make_engine(name)
+        if hasattr(engine, "warm_up"):
+            start = time.perf_counter()
+            engine.warm_up()
+            print(f"{name}: model load {time.perf_counter() - start:.2f} s")
+        language = None if engine.multilingual else args.language
+
+        latencies, rtfs = [], []
+        for _ in range(args.runs):
+            for _, audio_data, duration in clips:
+                start = time.perf_counter()
+                engine.recognize(audio_data, language)
+                elapsed = time.perf_counter() - start
+                latencies.append(elapsed * 1000)
+                rtfs.append(elapsed / duration)
+
+        start = time.perf_counter()
+        engine.recognize_batch([audio_data for _, audio_data, _ in clips], language)
+        batch_rtf = (time.perf_counter() - start) / total_audio
+
+        print(f"{name:<8} RTF mean {statistics.mean(rtfs):6.3f}   batch RTF {batch_rtf:6.3f}   "
+              f"p50 {percentile(latencies, 0.5):8.1f} ms   p95 {percentile(latencies, 0.95):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
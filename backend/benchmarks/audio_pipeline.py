@@ -0,0 +1,71 @@
+"""
+Audio preparation cost for /process-audio: old temp-file chain vs in-memory pipeline.
+
+    python benchmarks/audio_pipeline.py clip1.webm clip2.wav ... [--runs 10]
+
+Needs ffmpeg on PATH (pydub decodes through it). Recognition itself is not
+timed, only the work needed to produce the recognizer's AudioData.
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+from pydub import AudioSegment
+from audio_pipeline import prepare_audio
+
+
+def legacy_prepare(content: bytes) -> sr.AudioData:
+    """pydub normalize/strip_silence, WAV export, temp file, sr.AudioFile (the old process_audio path)"""
+    segment = AudioSegment.from_file(io.BytesIO(content))
+    segment = segment.normalize().strip_silence(silence_len=200, silence_thresh=-50)
+    wav_io = io.BytesIO()
+    segment.export(wav_io, format="wav", parameters=["-ar", "16000", "-ac", "1"])
+    wav_io.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_audio:
+        temp_audio.write(wav_io.read())
+        path = temp_audio.name
+    try:
+        recognizer = sr.Recognizer()
+        with sr.AudioFile(path) as source:
+            recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            return recognizer.record(source)
+    finally:
+        os.unlink(path)
+
+
+def bench(prepare, clips, runs):
+    samples = []
+    for _ in range(runs):
+        for content in clips:
+            start = time.perf_counter()
+            prepare(content)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("clips", nargs="+")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    clips = []
+    for path in args.clips:
+        with open(path, "rb") as f:
+            clips.append(f.read())
+
+    for label, prepare in (("temp-file", legacy_prepare), ("in-memory", prepare_audio)):
+        samples = sorted(bench(prepare, clips, args.runs))
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        print(f"{label:<10} mean {statistics.mean(samples):8.2f} ms   p50 {statistics.median(samples):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
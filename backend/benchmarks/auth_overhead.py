@@ -0,0 +1,84 @@
+"""
+Per-request authentication overhead with and without the principal cache.
+
+    python benchmarks/auth_overhead.py [--requests 2000] [--users 50] [--db-ms 2]
+
+get_current_user runs against an in-memory stand-in for the Mongo users
+collection that sleeps db-ms per find_one, like a LAN round trip. The cold
+run clears the cache before every request (the old behaviour: JWT decode plus
+a lookup each time); the warm run reuses it.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import auth
+
+
+class FakeUsers:
+    def __init__(self, usernames, delay):
+        self.docs = {name: {"username": name, "email": f"{name}@example.com", "full_name": name,
+                            "disabled": False, "hashed_password": "x"} for name in usernames}
+        self.delay = delay
+        self.finds = 0
+
+    async def find_one(self, query, projection=None):
+        self.finds += 1
+        await asyncio.sleep(self.delay)
+        doc = self.docs.get(query["username"])
+        if doc is None or projection is None:
+            return doc
+        return {key: value for key, value in doc.items() if projection.get(key)}
+
+
+async def measure(tokens, requests, clear_each):
+    latencies = []
+    for i in range(requests):
+        if clear_each:
+            auth.principals = auth.PrincipalCache()
+        start = time.perf_counter()
+        await auth.get_current_user(tokens[i % len(tokens)])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name, latencies, finds):
+    latencies = sorted(latencies)
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    print(f"{name:<5} mean {statistics.mean(latencies):7.3f} ms   p50 {latencies[len(latencies) // 2]:7.3f} ms   "
+          f"p99 {p99:7.3f} ms   db lookups {finds}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--db-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    usernames = [f"user{i}" for i in range(args.users)]
+    users = FakeUsers(usernames, args.db_ms / 1000)
+    auth.users_collection = users
+    tokens = [auth.create_access_token({"sub": name}, timedelta(minutes=30)) for name in usernames]
+
+    report("cold", await measure(tokens, args.requests, clear_each=True), users.finds)
+    users.finds = 0
+    auth.principals = auth.PrincipalCache()
+    report("warm", await measure(tokens, args.requests, clear_each=False), users.finds)
+    print(auth.principals.stats())
+
+    # Disabling a user must reach their next request
+    users.docs[usernames[0]]["disabled"] = True
+    auth.principals.invalidate_user(usernames[0])
+    assert (await auth.get_current_user(tokens[0])).disabled
+    print("invalidation ok")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
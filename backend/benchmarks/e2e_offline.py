@@ -0,0 +1,254 @@
+"""
+End-to-end load test of the FastAPI app, fully offline.
+
+    python benchmarks/e2e_offline.py [--requests 200] [--concurrency 16] [--latency llm=800 asr=200]
+    python benchmarks/e2e_offline.py --save-baseline      # record the current numbers
+    python benchmarks/e2e_offline.py                      # compare against them
+
+Every external service (Google ASR, Gemini LLM and embeddings, Qdrant,
+MongoDB, gTTS) is replaced by a fake from benchmarks/fakes.py with
+injected latency; everything else (audio decoding, Haar cascades, bcrypt,
+caches, queues, the graph) is the real code. The app runs in-process
+behind httpx's ASGI transport with its lifespan, so warm-up and shutdown
+draining happen as in production.
+
+Reports throughput and p50/p95/p99 per scenario. With a stored baseline,
+a scenario regresses when its p95 grows or its throughput drops by more
+than --tolerance; the exit status is 1 if any did.
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import wave
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+# Backend first: some benchmark scripts share names with backend modules (audio_pipeline)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baselines", "e2e_offline.json")
+SCENARIOS = ["auth_signup", "auth_login", "users_me", "process_audio", "detect_face"]
+
+
+def configure_env(args):
+    """Settings read at import time; must run before api is imported"""
+    os.environ.setdefault("SECRET_KEY", "offline-benchmark")
+    os.environ.setdefault("TTS_CACHE_DIR", tempfile.mkdtemp(prefix="e2e_tts_"))
+    os.environ["VISION_WORKERS"] = str(args.vision_workers)
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    os.environ.setdefault("MEMORY_COALESCE_SECONDS", "0.5")
+    os.environ.pop("QDRANT_PATH", None)
+
+
+def make_wav(seconds=2.0, rate=16000):
+    """Speech-like test clip: tone bursts over low noise, 16-bit mono"""
+    import numpy as np
+    t = np.arange(int(seconds * rate)) / rate
+    envelope = (np.sin(2 * math.pi * 3 * t) > 0).astype(np.float32)
+    signal = 0.4 * envelope * np.sin(2 * math.pi * 220 * t) + 0.01 * np.random.default_rng(0).standard_normal(len(t))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes((signal * 32767).astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+
+def make_frame(width=640, height=480):
+    """JPEG webcam-sized frame with a face-like blob"""
+    import cv2
+    import numpy as np
+    frame = np.full((height, width, 3), 120, np.uint8)
+    cv2.ellipse(frame, (width // 2, height // 2), (90, 120), 0, 0, 360, (180, 160, 150), -1)
+    for dx in (-35, 35):
+        cv2.circle(frame, (width // 2 + dx, height // 2 - 30), 12, (40, 40, 40), -1)
+    cv2.ellipse(frame, (width // 2, height // 2 + 50), (40, 15), 0, 0, 180, (60, 40, 40), 3)
+    ok, encoded = cv2.imencode(".jpg", frame)
+    return encoded.tobytes()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(max(math.ceil(len(values) * fraction) - 1, 0), len(values) - 1)]
+
+
+async def run_scenario(send, total, concurrency):
+    latencies, errors = [], 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        async with slots:
+            start = time.perf_counter()
+            try:
+                response = await send(i)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    wall = time.perf_counter() - start
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / wall, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+    }
+
+
+async def wait_ready(client, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = await client.get("/ready")
+        if response.status_code == 200:
+            return response.json()
+        await asyncio.sleep(0.1)
+    raise RuntimeError(f"app not ready after {timeout}s: {response.json()}")
+
+
+async def benchmark(args, latency):
+    import httpx
+    import api
+    import fakes
+
+    fakes.install(api, latency)
+    wav, frame = make_wav(), make_frame()
+    password = "offline-benchmark-password"
+    results = {}
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with api.app.router.lifespan_context(api.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            ready = await wait_ready(client)
+            warm = {name: component["duration_ms"] for name, component in ready["components"].items()}
+            print(f"ready in {ready['uptime_s']} s, warm-up ms: {warm}")
+
+            users = [f"bench{i}" for i in range(args.requests)]
+            tokens = {}
+
+            async def signup(i):
+                response = await client.post("/auth/signup", json={"username": users[i], "password": password})
+                if response.status_code == 200:
+                    tokens[users[i]] = response.json()["access_token"]
+                return response
+
+            async def login(i):
+                registered = list(tokens)
+                return await client.post("/auth/login", data={"username": registered[i % len(registered)], "password": password})
+
+            def auth_header(i):
+                issued = list(tokens.values())
+                return {"Authorization": f"Bearer {issued[i % len(issued)]}"}
+
+            async def users_me(i):
+                return await client.get("/users/me", headers=auth_header(i))
+
+            async def process_audio(i):
+                # A handful of speakers, so memory and context caches see repeat users
+                return await client.post("/process-audio", headers=auth_header(i % args.speakers),
+                                         files={"audio": ("turn.wav", wav, "audio/wav")},
+                                         data={"expression": "Neutral", "expression_confidence": "0.8"})
+
+            async def detect_face(i):
+                return await client.post("/detect-face", files={"image": ("frame.jpg", frame, "image/jpeg")},
+                                         data={"session_id": f"session{i % args.speakers}"})
+
+            senders = {"auth_signup": signup, "auth_login": login, "users_me": users_me,
+                       "process_audio": process_audio, "detect_face": detect_face}
+            if "auth_signup" not in args.scenarios:
+                # Later scenarios need accounts and tokens
+                await asyncio.gather(*(signup(i) for i in range(max(args.speakers, 1))))
+            for name in SCENARIOS:
+                if name not in args.scenarios:
+                    continue
+                count = args.audio_requests if name == "process_audio" else args.requests
+                results[name] = await run_scenario(senders[name], count, args.concurrency)
+                print(f"{name:<14} {json.dumps(results[name])}")
+
+            metrics_text = (await client.get("/metrics")).text
+            print(f"/metrics: {len(metrics_text.splitlines())} lines")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        p95_change = current["p95_ms"] / previous["p95_ms"] - 1 if previous["p95_ms"] else 0.0
+        rps_change = current["throughput_rps"] / previous["throughput_rps"] - 1 if previous["throughput_rps"] else 0.0
+        flag = p95_change > tolerance or rps_change < -tolerance
+        if flag:
+            regressions.append(name)
+        print(f"{name:<14} p95 {previous['p95_ms']:8.1f} -> {current['p95_ms']:8.1f} ms ({p95_change:+.0%})   "
+              f"rps {previous['throughput_rps']:7.2f} -> {current['throughput_rps']:7.2f} ({rps_change:+.0%})"
+              f"{'   REGRESSION' if flag else ''}")
+    return regressions
+
+
+def parse_latency(pairs):
+    overrides = {}
+    for pair in pairs:
+        service, _, value = pair.partition("=")
+        overrides[service] = float(value)
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200, help="requests per auth/vision scenario")
+    parser.add_argument("--audio-requests", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--speakers", type=int, default=8)
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--latency", nargs="*", default=[], metavar="SERVICE=MS",
+                        help="override fake latencies, e.g. llm=800 (services: asr llm embed qdrant mongo tts memory)")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--vision-workers", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    configure_env(args)
+    import fakes
+    latency = fakes.Latency(parse_latency(args.latency))
+    results = asyncio.run(benchmark(args, latency))
+
+    config = {"concurrency": args.concurrency, "requests": args.requests, "audio_requests": args.audio_requests,
+              "bcrypt_rounds": args.bcrypt_rounds, "vision_workers": args.vision_workers, "latency_ms": latency.ms}
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("no baseline yet; run with --save-baseline to record one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("config") != config:
+        print(f"warning: baseline was recorded with {baseline.get('config')}")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"regressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Embedding cache and micro-batching against a local fake embedder.
+
+    python benchmarks/embedding_cache.py [--users 32] [--turns 20] [--call-ms 80] [--window-ms 10]
+
+The fake embedder sleeps call-ms per request (regardless of batch size, as a
+network round trip would) and returns deterministic vectors. Users draw from
+a small set of common utterances plus unique ones, so the run reports cache
+hit rate, batch sizes and latency next to an uncached, unbatched baseline.
+"""
+import argparse
+import hashlib
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from embeddings import CachedEmbedder, EmbeddingBatcher, EmbeddingCache
+
+COMMON = ["hi", "I'm fine", "thank you", "I feel anxious today", "I couldn't sleep",
+          "okay", "yes", "no", "I don't know", "bye"]
+
+
+class FakeEmbedder:
+    def __init__(self, call_seconds, dims=768):
+        self.config = SimpleNamespace(model="fake-embedding", embedding_dims=dims)
+        self.call_seconds = call_seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "little")
+        return np.random.default_rng(seed).standard_normal(self.config.embedding_dims).astype(np.float32).tolist()
+
+    def embed_many(self, texts):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.call_seconds)
+        return [self._vector(text) for text in texts]
+
+    def embed(self, text, memory_action=None):
+        return self.embed_many([text])[0]
+
+
+def utterances(user, turns, common_fraction):
+    rng = random.Random(user)
+    return [rng.choice(COMMON) if rng.random() < common_fraction else f"user {user} turn {turn} says something new"
+            for turn in range(turns)]
+
+
+def run(embed, users, turns, common_fraction):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(user):
+        for text in utterances(user, turns, common_fraction):
+            start = time.perf_counter()
+            embed(text)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(user,)) for user in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def report(name, wall, latencies, calls):
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    print(f"{name:<10} wall {wall:6.2f} s   embed calls {calls:5d}   "
+          f"mean {statistics.mean(latencies):7.1f} ms   p95 {p95:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--common", type=float, default=0.5, help="share of utterances drawn from COMMON")
+    parser.add_argument("--call-ms", type=float, default=80)
+    parser.add_argument("--window-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    baseline = FakeEmbedder(args.call_ms / 1000)
+    wall, latencies = run(baseline.embed, args.users, args.turns, args.common)
+    report("direct", wall, latencies, baseline.calls)
+
+    fake = FakeEmbedder(args.call_ms / 1000)
+    cached = CachedEmbedder(fake, cache=EmbeddingCache(fake.config.model, directory=""),
+                            batcher=EmbeddingBatcher(fake.embed_many, window=args.window_ms / 1000))
+    wall, latencies = run(cached.embed, args.users, args.turns, args.common)
+    report("cached", wall, latencies, fake.calls)
+
+    stats = cached.stats()
+    print(f"hit rate {stats['hit_rate']:.1%}   batches {stats['batches']}   "
+          f"avg batch {stats['avg_batch_size']:.1f}   max batch {stats['max_batch_size']}")
+    print(f"batch sizes {stats['batch_sizes']}")
+
+    # Cached and direct embeddings of the same text must agree
+    for text in COMMON:
+        assert np.allclose(cached.embed(text), baseline.embed(text)), text
+    print("parity ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Expression classifier throughput (frames/sec on one core) and label parity.
+
+Checks that vision.detect_expression_from_face labels every face like the old
+classifier, then times the two changes separately on the same crops:
+eager (all five cascade sweeps) vs lazy (sweeps run in rule order and
+stop at the first rule that decides the label), each with the old
+per-band np.mean/np.std statistics and with the prefix-sum region_stats.
+The lazy gain depends on the faces: a strong smile needs one sweep, a
+neutral face still needs all five. Without arguments the test fixture
+portrait is used.
+
+    python benchmarks/expression_throughput.py face1.jpg face2.jpg ... [--runs 20]
+
+Frames are run through the face cascade first; frames without a face are skipped.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+import vision
+
+DEFAULT_FRAME = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "astronaut.jpg")
+
+
+def legacy_stats(face_gray):
+    """Band statistics the way the old classifier computed them, one reduction per slice"""
+    height = face_gray.shape[0]
+    return {
+        "brightness": np.mean(face_gray),
+        "upper_brightness": np.mean(face_gray[0:int(height*0.5), :]),
+        "lower_brightness": np.mean(face_gray[int(height*0.5):, :]),
+        "middle_brightness": np.mean(face_gray[int(height*0.3):int(height*0.7), :]),
+        "lower_contrast": np.std(face_gray[int(height*0.66):, :]),
+    }
+
+
+def make_classifier(stats, lazy):
+    def classify(face_gray, face_color):
+        smiles = vision.RuleCounts(face_gray, vision.cascades.get("smile"), vision.SMILE_RULES)
+        eyes = vision.RuleCounts(face_gray, vision.cascades.get("eye"), vision.EYE_RULES)
+        if not lazy:
+            for counts in (smiles, eyes):
+                for name in counts.rules:
+                    counts[name]
+        return vision.classify_expression(smiles, eyes, stats(face_gray))
+    return classify
+
+
+# The classifier /detect-face used before: every sweep, per-slice statistics
+legacy_expression = make_classifier(legacy_stats, lazy=False)
+
+
+def load_faces(paths):
+    faces = []
+    for path in paths:
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is None:
+            print(f"skip {path}: unreadable")
+            continue
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        found = vision.cascades.get("face").detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(50, 50))
+        if len(found) == 0:
+            print(f"skip {path}: no face")
+            continue
+        x, y, w, h = found[0]
+        faces.append((path, gray[y:y+h, x:x+w], frame[y:y+h, x:x+w]))
+    return faces
+
+
+def fps(classify, faces, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        for _, face_gray, face_color in faces:
+            classify(face_gray, face_color)
+    return runs * len(faces) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("frames", nargs="*", default=[DEFAULT_FRAME])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    # Measure per core
+    cv2.setNumThreads(1)
+    faces = load_faces(args.frames)
+    if not faces:
+        sys.exit("no faces found in the given frames")
+
+    mismatches = 0
+    for path, face_gray, face_color in faces:
+        before = legacy_expression(face_gray, face_color)[0]
+        after = vision.detect_expression_from_face(face_gray, face_color)[0]
+        if before != after:
+            mismatches += 1
+            print(f"label mismatch {path}: {before} -> {after}")
+    print(f"label parity: {len(faces) - mismatches}/{len(faces)}")
+
+    for lazy in (False, True):
+        for stats in (legacy_stats, vision.region_stats):
+            rate = fps(make_classifier(stats, lazy), faces, args.runs)
+            print(f"{'lazy ' if lazy else 'eager'}  {stats.__name__:<13} {rate:8.1f} frames/sec/core")
+
+if __name__ == "__main__":
+    main()
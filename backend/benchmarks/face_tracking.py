@@ -0,0 +1,98 @@
+"""
+Face detection latency with and without the keyframe tracker.
+
+Builds a synthetic sequence by sliding a face crop across a noisy 640x480
+background and runs it through vision.analyze_gray, once with full-frame
+detection on every frame and once through a FaceTracker. Reports per-frame
+latency and how often the reported box overlaps the true face position.
+
+    python benchmarks/face_tracking.py [face.jpg] [--frames 200] [--downscale 1.0]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+import vision
+from tracking import FaceTracker, box_iou
+
+DEFAULT_FRAME = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "astronaut.jpg")
+FRAME_SIZE = (480, 640)
+
+
+def face_crop(path):
+    gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        sys.exit(f"cannot read {path}")
+    box = vision.find_face(gray)
+    if box is None:
+        sys.exit(f"no face in {path}")
+    x, y, w, h = box
+    # Keep some context around the face so the cascade still fires
+    pad = w // 3
+    crop = gray[max(y - pad, 0):y + h + pad, max(x - pad, 0):x + w + pad]
+    scale = 200 / crop.shape[1]
+    return cv2.resize(crop, (200, int(crop.shape[0] * scale)))
+
+
+def synthetic_sequence(crop, count, seed=0):
+    """Yield (frame, true_box) with the crop drifting along a slow Lissajous path"""
+    rng = np.random.default_rng(seed)
+    height, width = FRAME_SIZE
+    ch, cw = crop.shape
+    for i in range(count):
+        frame = rng.integers(90, 140, size=FRAME_SIZE, dtype=np.uint8)
+        t = i / 25.0
+        x = int((width - cw) * (0.5 + 0.4 * np.sin(t)))
+        y = int((height - ch) * (0.5 + 0.4 * np.sin(1.7 * t)))
+        frame[y:y + ch, x:x + cw] = crop
+        yield frame, (x, y, cw, ch)
+
+
+def run(sequence, tracker=None):
+    latencies, hits, tracked = [], 0, 0
+    for gray, truth in sequence:
+        start = time.perf_counter()
+        if tracker is None:
+            result = vision.analyze_gray(gray)
+        else:
+            result = vision.analyze_gray(gray, region=tracker.search_region())
+            tracker.update(result)
+        latencies.append((time.perf_counter() - start) * 1000)
+        dims = result.get("face_dimensions")
+        if dims and box_iou((dims["x"], dims["y"], dims["width"], dims["height"]), truth) > 0.2:
+            hits += 1
+        tracked += bool(result.get("tracked"))
+    return latencies, hits, tracked
+
+
+def report(label, latencies, hits, tracked, total):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<10} mean {statistics.mean(latencies):7.2f} ms   p95 {p95:7.2f} ms   "
+          f"found {hits}/{total}   tracked {tracked}/{total}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("face", nargs="?", default=DEFAULT_FRAME)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--downscale", type=float, default=vision.FACE_DETECT_DOWNSCALE)
+    args = parser.parse_args()
+
+    vision.FACE_DETECT_DOWNSCALE = args.downscale
+    vision.cascades.warm_up()
+    crop = face_crop(args.face)
+    sequence = list(synthetic_sequence(crop, args.frames))
+
+    report("full", *run(sequence), args.frames)
+    report("tracked", *run(sequence, FaceTracker()), args.frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Local stand-ins for every external service the backend talks to.
+
+Each fake sleeps for a configurable latency (milliseconds, with +/-20%
+jitter) instead of making a network call, so the whole app can be driven
+offline. install() patches them into an already imported api module.
+
+    asr     Google speech recognition, one call per utterance
+    llm     Gemini chat model
+    embed   Gemini embedding call (single or batched)
+    qdrant  Qdrant scroll/search round trip
+    mongo   MongoDB round trip
+    tts     gTTS synthesis of one clip
+    memory  mem0's LLM fact extraction inside memory.add
+"""
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+
+DEFAULT_LATENCY_MS = {"asr": 300, "llm": 600, "embed": 80, "qdrant": 30, "mongo": 2, "tts": 250, "memory": 400}
+DIMS = 768
+TRANSCRIPTS = [
+    "I have been feeling anxious about work lately",
+    "I couldn't sleep well last night",
+    "Thank you, that helps a little",
+    "My sister visited me this weekend",
+    "I'm fine, just a bit tired",
+    "I keep worrying about my exams",
+]
+
+
+class Latency:
+    def __init__(self, overrides=None, seed=0):
+        self.ms = {**DEFAULT_LATENCY_MS, **(overrides or {})}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def seconds(self, service: str) -> float:
+        with self._lock:
+            jitter = self._rng.uniform(0.8, 1.2)
+        return self.ms[service] * jitter / 1000
+
+    def sleep(self, service: str):
+        time.sleep(self.seconds(service))
+
+    async def asleep(self, service: str):
+        await asyncio.sleep(self.seconds(service))
+
+
+def fake_vector(text: str):
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "little")
+    vector = np.random.default_rng(seed).standard_normal(DIMS).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class FakeASR:
+    """RecognitionStage engine; detects the language itself, so one call per utterance"""
+
+    name = "fake"
+    multilingual = True
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self._turn = 0
+        self._lock = threading.Lock()
+
+    def recognize(self, audio_data, language=None):
+        from speech import Hypothesis
+        self.latency.sleep("asr")
+        with self._lock:
+            self._turn += 1
+            transcript = TRANSCRIPTS[self._turn % len(TRANSCRIPTS)]
+        return Hypothesis(transcript, 0.92, "en-US")
+
+    def recognize_batch(self, audios, language=None):
+        return [self.recognize(audio_data, language) for audio_data in audios]
+
+
+class FakeLLM:
+    """Chat model with the one method the graph calls"""
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+
+    def invoke(self, messages):
+        from langchain_core.messages import AIMessage
+        self.latency.sleep("llm")
+        last = messages[-1]
+        text = getattr(last, "content", "")
+        return AIMessage(content=f"I hear you. It sounds like {text[-60:].lower()} weighs on you. "
+                                 f"Would you like to talk about what makes it hard?")
+
+
+class FakeEmbedder:
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.config = SimpleNamespace(model="fake-embedding", embedding_dims=DIMS)
+
+    def embed_many(self, texts):
+        # One round trip whatever the batch size, like the batch endpoint
+        self.latency.sleep("embed")
+        return [fake_vector(text) for text in texts]
+
+    def embed(self, text, memory_action=None):
+        return self.embed_many([text])[0]
+
+
+class FakeQdrant:
+    """The slice of QdrantClient used by the app: get_collections and a user-filtered scroll"""
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.points = {}
+        self._lock = threading.Lock()
+
+    def get_collections(self):
+        self.latency.sleep("qdrant")
+        return SimpleNamespace(collections=[])
+
+    def upsert_point(self, user_id, text, vector):
+        now = datetime.now(timezone.utc).isoformat()
+        point = SimpleNamespace(id=hashlib.md5(f"{user_id}\0{text}".encode("utf-8")).hexdigest(), vector=vector,
+                                payload={"data": text, "user_id": user_id, "created_at": now, "updated_at": now})
+        with self._lock:
+            self.points.setdefault(user_id, {})[point.id] = point
+
+    def user_points(self, user_id):
+        with self._lock:
+            return list(self.points.get(user_id, {}).values())
+
+    def scroll(self, collection_name, scroll_filter=None, limit=10, with_payload=True, with_vectors=False, **kwargs):
+        self.latency.sleep("qdrant")
+        user_id = scroll_filter.must[0].match.value
+        return self.user_points(user_id)[:limit], None
+
+
+class FakeMemory:
+    """mem0 Memory stand-in: add (with fact extraction latency), search and get_all over FakeQdrant"""
+
+    def __init__(self, latency: Latency, qdrant: FakeQdrant):
+        self.latency = latency
+        self.embedding_model = FakeEmbedder(latency)
+        self.vector_store = SimpleNamespace(client=qdrant, collection_name="bench")
+
+    def add(self, conversation, user_id):
+        self.latency.sleep("memory")
+        facts = [line.removeprefix("User: ") for line in conversation.split("\n") if line.startswith("User: ")]
+        for fact in facts:
+            self.vector_store.client.upsert_point(user_id, fact, self.embedding_model.embed(fact, "add"))
+        return {"results": [{"memory": fact, "event": "ADD"} for fact in facts]}
+
+    def _results(self, points, scores=None):
+        return [{"id": point.id, "memory": point.payload["data"], "user_id": point.payload["user_id"],
+                 "created_at": point.payload["created_at"], "updated_at": point.payload["updated_at"],
+                 **({"score": float(scores[i])} if scores is not None else {})}
+                for i, point in enumerate(points)]
+
+    def search(self, query, user_id, limit=100):
+        query_vector = np.asarray(self.embedding_model.embed(query, "search"), dtype=np.float32)
+        self.latency.sleep("qdrant")
+        points = self.vector_store.client.user_points(user_id)
+        if not points:
+            return {"results": []}
+        scores = np.asarray([point.vector for point in points], dtype=np.float32) @ query_vector
+        order = np.argsort(-scores)[:limit]
+        return {"results": self._results([points[i] for i in order], scores[order])}
+
+    def get_all(self, user_id):
+        self.latency.sleep("qdrant")
+        return {"results": self._results(self.vector_store.client.user_points(user_id))}
+
+
+class FakeUsers:
+    """Async users collection with the motor calls auth.py and the signup route make"""
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.docs = {}
+        admin = SimpleNamespace(command=self._command)
+        self.database = SimpleNamespace(client=SimpleNamespace(admin=admin))
+
+    async def _command(self, name):
+        await self.latency.asleep("mongo")
+        return {"ok": 1}
+
+    async def create_index(self, key, unique=False):
+        await self.latency.asleep("mongo")
+        return f"{key}_1"
+
+    async def find_one(self, query, projection=None):
+        await self.latency.asleep("mongo")
+        doc = self.docs.get(query["username"])
+        if doc is None or projection is None:
+            return dict(doc) if doc else None
+        return {key: value for key, value in doc.items() if projection.get(key)}
+
+    async def insert_one(self, doc):
+        from pymongo.errors import DuplicateKeyError
+        await self.latency.asleep("mongo")
+        if doc["username"] in self.docs:
+            raise DuplicateKeyError("duplicate username")
+        self.docs[doc["username"]] = dict(doc)
+        return SimpleNamespace(inserted_id=doc["username"])
+
+    async def update_one(self, query, update):
+        await self.latency.asleep("mongo")
+        doc = self.docs.get(query["username"])
+        if doc is None or any(doc.get(key) != value for key, value in query.items()):
+            return SimpleNamespace(modified_count=0)
+        doc.update(update["$set"])
+        return SimpleNamespace(modified_count=1)
+
+
+def make_gtts(latency: Latency):
+    class FakeGTTS:
+        """gTTS stand-in writing a deterministic pseudo-MP3 of realistic size"""
+
+        def __init__(self, text, lang="en", tld="com", slow=False):
+            self.text = text
+
+        def write_to_fp(self, fp):
+            latency.sleep("tts")
+            digest = hashlib.sha256(self.text.encode("utf-8")).digest()
+            # ~1 KB per 10 characters, about what 32 kbps speech comes to
+            fp.write(b"ID3" + digest * max(len(self.text) * 3, 32))
+
+    return FakeGTTS
+
+
+def install(api, latency: Latency):
+    """Swap every external client the imported api module uses for a fake"""
+    import auth
+    import embeddings
+    import graph
+    import memory_store
+    import qdrant_config
+    import tts
+
+    qdrant = FakeQdrant(latency)
+    qdrant_config.qdrant_client = qdrant
+    graph.qdrant_client = qdrant
+    graph.llm = FakeLLM(latency)
+    auth.users_collection = FakeUsers(latency)
+    fake_memory = FakeMemory(latency, qdrant)
+    # Same cache/batching layer as production, batching through the fake's embed_many
+    fake_memory.embedding_model = embeddings.CachedEmbedder(
+        fake_memory.embedding_model, embed_many=fake_memory.embedding_model.embed_many)
+    memory_store.memory = fake_memory
+    api.recognition.engine = FakeASR(latency)
+    tts.gTTS = make_gtts(latency)
+    return SimpleNamespace(qdrant=qdrant, memory=fake_memory, users=auth.users_collection)
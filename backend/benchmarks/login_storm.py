@@ -0,0 +1,84 @@
+"""
+Event-loop latency seen by other requests during a login storm.
+
+    python benchmarks/login_storm.py [--logins 200] [--concurrency 50] [--rounds 12]
+
+A probe task stands in for the other endpoints: it wakes every 5 ms and
+records how late it was. Meanwhile batches of concurrent logins verify a
+bcrypt password either inline on the loop (the old handlers) or through
+auth.hashing. Reports probe p50/p99 and login throughput for both.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+import auth
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append((time.perf_counter() - start - PROBE_INTERVAL) * 1000)
+
+
+async def storm(verify, logins, concurrency):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with slots:
+            await verify()
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(int(len(values) * fraction) - 1, 0)]
+
+
+async def run(name, verify, args):
+    lags, stop = [], asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    start = time.perf_counter()
+    await storm(verify, args.logins, args.concurrency)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    print(f"{name:<9} logins/s {args.logins / elapsed:7.1f}   other-request lag p50 {percentile(lags, 0.5):7.2f} ms   "
+          f"p99 {percentile(lags, 0.99):8.2f} ms   max {max(lags):8.2f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=auth.BCRYPT_ROUNDS)
+    args = parser.parse_args()
+
+    password = "correct horse battery staple"
+    stored = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=args.rounds)).decode("utf-8")
+
+    async def inline():
+        assert auth.verify_password(password, stored)
+
+    async def executor():
+        assert await auth.check_password(password, stored)
+
+    await run("inline", inline, args)
+    auth.hashing = auth.HashingExecutor(max_pending=args.logins)
+    await run("executor", executor, args)
+    stats = auth.hashing.stats()
+    print(f"executor: {stats['workers']} workers, queue avg {stats['queue_seconds_avg'] * 1000:.1f} ms, "
+          f"max {stats['queue_seconds_max'] * 1000:.1f} ms, hash avg {stats['run_seconds_avg'] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
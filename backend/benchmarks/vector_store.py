@@ -0,0 +1,177 @@
+"""
+Recall and latency of memory vector stores on synthetic 768-dim data.
+
+    python benchmarks/vector_store.py [--count 1000000] [--users 1000] [--stores flat local cloud]
+
+Vectors are generated into a memory-mapped float32 file and split evenly
+across users, like per-user memories. Every query is a perturbed copy of one
+of the user's vectors and is filtered to that user. Ground truth is exact
+cosine top-k over the user's partition.
+
+    flat   NumPy top-k over the partition, as memory_cache does in process
+    local  embedded Qdrant (QDRANT_PATH mode) in a temporary directory
+    cloud  the Qdrant Cloud cluster from QDRANT_URL/QDRANT_API_KEY, in a scratch collection
+
+Embedded Qdrant keeps points in SQLite and searches by brute force, so
+loading 1M points there takes a while; --count scales everything down.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import (Distance, FieldCondition, Filter, MatchValue, PayloadSchemaType,
+                                  PointStruct, VectorParams)
+
+DIMS = 768
+CHUNK = 10000
+
+
+def generate(path, count, seed):
+    """Unit-norm random vectors in a float32 memmap of shape (count, DIMS)"""
+    vectors = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(count, DIMS))
+    rng = np.random.default_rng(seed)
+    for start in range(0, count, CHUNK):
+        chunk = rng.standard_normal((min(CHUNK, count - start), DIMS)).astype(np.float32)
+        chunk /= np.linalg.norm(chunk, axis=1, keepdims=True)
+        vectors[start:start + len(chunk)] = chunk
+    vectors.flush()
+    return vectors
+
+
+def partition(count, users):
+    """[start, end) row range of each user's memories"""
+    bounds = np.linspace(0, count, users + 1).astype(int)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def make_queries(vectors, ranges, queries, noise, seed):
+    rng = np.random.default_rng(seed + 1)
+    picked = []
+    for _ in range(queries):
+        user = int(rng.integers(len(ranges)))
+        start, end = ranges[user]
+        query = vectors[int(rng.integers(start, end))] + rng.standard_normal(DIMS).astype(np.float32) * noise
+        picked.append((user, query / np.linalg.norm(query)))
+    return picked
+
+
+def exact_top_k(vectors, ranges, user, query, k):
+    start, end = ranges[user]
+    scores = vectors[start:end] @ query
+    return set((start + np.argsort(-scores)[:k]).tolist())
+
+
+class FlatStore:
+    name = "flat"
+
+    def __init__(self, vectors, ranges):
+        self.vectors = vectors
+        self.ranges = ranges
+
+    def load(self):
+        pass
+
+    def search(self, user, query, k):
+        return exact_top_k(self.vectors, self.ranges, user, query, k)
+
+    def close(self):
+        pass
+
+
+class QdrantStore:
+    def __init__(self, name, client, vectors, ranges, batch):
+        self.name = name
+        self.client = client
+        self.vectors = vectors
+        self.ranges = ranges
+        self.batch = batch
+        self.collection = f"bench_{uuid.uuid4().hex[:8]}"
+
+    def load(self):
+        self.client.create_collection(self.collection, vectors_config=VectorParams(size=DIMS, distance=Distance.COSINE))
+        self.client.create_payload_index(self.collection, "user_id", PayloadSchemaType.KEYWORD)
+        for user, (start, end) in enumerate(self.ranges):
+            for offset in range(start, end, self.batch):
+                rows = range(offset, min(offset + self.batch, end))
+                self.client.upsert(self.collection, points=[
+                    PointStruct(id=row, vector=self.vectors[row].tolist(), payload={"user_id": str(user)})
+                    for row in rows
+                ], wait=True)
+
+    def search(self, user, query, k):
+        hits = self.client.query_points(
+            self.collection, query=query.tolist(), limit=k,
+            query_filter=Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=str(user)))]),
+        ).points
+        return {hit.id for hit in hits}
+
+    def close(self):
+        self.client.delete_collection(self.collection)
+        self.client.close()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(int(len(values) * fraction) - 1, 0)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--batch", type=int, default=256, help="points per upsert")
+    parser.add_argument("--stores", nargs="+", default=["flat", "local"], choices=["flat", "local", "cloud"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="vector_bench_")
+    try:
+        start = time.perf_counter()
+        vectors = generate(os.path.join(workdir, "vectors.npy"), args.count, args.seed)
+        ranges = partition(args.count, args.users)
+        queries = make_queries(vectors, ranges, args.queries, args.noise, args.seed)
+        truth = [exact_top_k(vectors, ranges, user, query, args.k) for user, query in queries]
+        print(f"{args.count} x {DIMS} vectors, {args.users} users, {args.queries} queries, "
+              f"generated in {time.perf_counter() - start:.1f} s")
+
+        for name in args.stores:
+            if name == "flat":
+                store = FlatStore(vectors, ranges)
+            elif name == "local":
+                store = QdrantStore("local", QdrantClient(path=os.path.join(workdir, "qdrant")), vectors, ranges, args.batch)
+            else:
+                client = QdrantClient(url=os.environ["QDRANT_URL"], api_key=os.environ["QDRANT_API_KEY"])
+                store = QdrantStore("cloud", client, vectors, ranges, args.batch)
+
+            start = time.perf_counter()
+            store.load()
+            load_seconds = time.perf_counter() - start
+            try:
+                latencies, recalls = [], []
+                for (user, query), expected in zip(queries, truth):
+                    start = time.perf_counter()
+                    found = store.search(user, query, args.k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    recalls.append(len(found & expected) / args.k)
+            finally:
+                store.close()
+
+            print(f"{store.name:<6} load {load_seconds:8.1f} s   recall@{args.k} {np.mean(recalls):.3f}   "
+                  f"p50 {percentile(latencies, 0.5):7.2f} ms   p95 {percentile(latencies, 0.95):7.2f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
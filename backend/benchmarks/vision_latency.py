@@ -0,0 +1,69 @@
+"""
+Per-frame latency of /detect-face's vision work.
+
+Compares loading the Haar cascades on every call (the old behaviour) against
+the shared CascadeRegistry. Pass JPEG frames on the command line, otherwise
+the test fixture portrait is used.
+
+    python benchmarks/vision_latency.py [frame.jpg ...] [--runs 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import vision
+
+DEFAULT_FRAME = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "astronaut.jpg")
+
+
+class _FreshCascades:
+    """Registry stand-in that re-parses the XML on every lookup"""
+
+    def get(self, name):
+        return cv2.CascadeClassifier(cv2.data.haarcascades + vision.CASCADE_FILES[name])
+
+
+def time_frames(frames, runs):
+    samples = []
+    for _ in range(runs):
+        for data in frames:
+            start = time.perf_counter()
+            vision.analyze_frame(data)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<12} mean {statistics.mean(samples):7.2f} ms   p50 {statistics.median(samples):7.2f} ms   p95 {p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("frames", nargs="*", default=[DEFAULT_FRAME])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    frames = []
+    for path in args.frames:
+        with open(path, "rb") as f:
+            frames.append(f.read())
+    print(f"{len(frames)} frame(s) x {args.runs} runs")
+
+    shared = vision.cascades
+    vision.cascades = _FreshCascades()
+    report("before", time_frames(frames, args.runs))
+
+    vision.cascades = shared
+    vision.cascades.warm_up()
+    report("after", time_frames(frames, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+# Most tokens of remembered context sent with a turn
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "400"))
+# Share of a memory's rank that comes from recency rather than search score
+CONTEXT_RECENCY_WEIGHT = float(os.getenv("CONTEXT_RECENCY_WEIGHT", "0.2"))
+CONTEXT_RECENCY_HALF_LIFE_DAYS = float(os.getenv("CONTEXT_RECENCY_HALF_LIFE_DAYS", "30"))
+# Word-overlap (Jaccard) above which a lower-ranked memory counts as a duplicate
+CONTEXT_DUPLICATE_SIMILARITY = float(os.getenv("CONTEXT_DUPLICATE_SIMILARITY", "0.8"))
+PROMPT_PREFIX_CACHE_USERS = int(os.getenv("PROMPT_PREFIX_CACHE_USERS", "1000"))
+
+WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting"""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def parse_timestamp(value):
+    if not value:
+        return None
+    try:
+        stamp = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)
+
+
+def recency(memory, now, half_life_days=CONTEXT_RECENCY_HALF_LIFE_DAYS) -> float:
+    """1.0 for a memory touched just now, halving every half_life_days; 0.5 if undated"""
+    stamp = parse_timestamp(memory.get("updated_at") or memory.get("created_at"))
+    if stamp is None:
+        return 0.5
+    age_days = max((now - stamp).total_seconds(), 0) / 86400
+    return 0.5 ** (age_days / half_life_days)
+
+
+def word_set(text: str):
+    return frozenset(WORD.findall(text.lower()))
+
+
+def similarity(a, b) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class TurnContext:
+    """Memory context picked for one turn and what the budget saved"""
+
+    def __init__(self, system_prompt, memories, tokens_used, tokens_available, duplicates, prefix_cached):
+        self.system_prompt = system_prompt
+        self.memories = memories
+        self.tokens_used = tokens_used
+        self.tokens_available = tokens_available
+        self.duplicates = duplicates
+        self.prefix_cached = prefix_cached
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_available - self.tokens_used
+
+    def report(self):
+        return {
+            "memories_used": len(self.memories),
+            "duplicates_removed": self.duplicates,
+            "tokens_used": self.tokens_used,
+            "tokens_available": self.tokens_available,
+            "tokens_saved": self.tokens_saved,
+            "prefix_cached": self.prefix_cached,
+        }
+
+
+class ContextBudgeter:
+    """
+    Builds the per-turn system prompt from searched memories.
+
+    Memories are ranked by a blend of search score and recency, near
+    duplicates of better-ranked ones are dropped, and the best are packed
+    into token_budget. The chosen memories are listed in a stable order
+    (oldest first), so the same selection yields byte-identical prompt
+    prefixes that provider-side prefix caching can reuse; the last prefix per
+    user is kept here as well.
+    """
+
+    def __init__(self, base_prompt: str, token_budget=CONTEXT_TOKEN_BUDGET, recency_weight=CONTEXT_RECENCY_WEIGHT,
+                 duplicate_similarity=CONTEXT_DUPLICATE_SIMILARITY, max_users=PROMPT_PREFIX_CACHE_USERS):
+        self.base_prompt = base_prompt
+        self.token_budget = token_budget
+        self.recency_weight = recency_weight
+        self.duplicate_similarity = duplicate_similarity
+        self.max_users = max_users
+        self._prefixes = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"turns": 0, "tokens_used": 0, "tokens_saved": 0, "duplicates_removed": 0,
+                         "prefix_hits": 0, "prefix_misses": 0}
+
+    def rank(self, memories, now=None):
+        now = now or datetime.now(timezone.utc)
+        scored = []
+        for memory in memories:
+            relevance = memory.get("score")
+            relevance = 0.5 if relevance is None else float(relevance)
+            rank = (1 - self.recency_weight) * relevance + self.recency_weight * recency(memory, now)
+            scored.append((rank, memory))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return [memory for _, memory in scored]
+
+    def select(self, ranked):
+        """(kept memories, tokens used, duplicates removed) within the token budget"""
+        kept, kept_words, used, duplicates = [], [], 0, 0
+        for memory in ranked:
+            words = word_set(memory["memory"])
+            if any(similarity(words, other) >= self.duplicate_similarity for other in kept_words):
+                duplicates += 1
+                continue
+            cost = estimate_tokens(memory["memory"])
+            # Skip what does not fit; a shorter, lower-ranked memory may still
+            if used + cost > self.token_budget:
+                continue
+            kept.append(memory)
+            kept_words.append(words)
+            used += cost
+        return kept, used, duplicates
+
+    def prefix(self, user_id: str, memories) -> tuple:
+        """(system prompt for these memories, whether it was already cached for the user)"""
+        ordered = sorted(memories, key=lambda m: (str(m.get("created_at") or ""), str(m.get("id") or ""), m["memory"]))
+        lines = "\n".join(f"- {memory['memory']}" for memory in ordered)
+        key = hashlib.sha256(lines.encode("utf-8")).hexdigest()
+        with self._lock:
+            cached = self._prefixes.get(user_id)
+            if cached is not None and cached[0] == key:
+                self._prefixes.move_to_end(user_id)
+                self.counters["prefix_hits"] += 1
+                return cached[1], True
+            self.counters["prefix_misses"] += 1
+
+        prompt = self.base_prompt
+        if lines:
+            prompt = f"{prompt}\n\nWhat you remember about this user from previous conversations:\n{lines}"
+        with self._lock:
+            self._prefixes[user_id] = (key, prompt)
+            self._prefixes.move_to_end(user_id)
+            while len(self._prefixes) > self.max_users:
+                self._prefixes.popitem(last=False)
+        return prompt, False
+
+    def assemble(self, user_id: str, memories) -> TurnContext:
+        memories = [memory for memory in memories if memory.get("memory")]
+        available = sum(estimate_tokens(memory["memory"]) for memory in memories)
+        kept, used, duplicates = self.select(self.rank(memories))
+        system_prompt, cached = self.prefix(user_id, kept)
+        context = TurnContext(system_prompt, kept, used, available, duplicates, cached)
+        with self._lock:
+            self.counters["turns"] += 1
+            self.counters["tokens_used"] += used
+            self.counters["tokens_saved"] += context.tokens_saved
+            self.counters["duplicates_removed"] += duplicates
+        return context
+
+    def stats(self):
+        with self._lock:
+            turns = self.counters["turns"]
+            return {**self.counters, "token_budget": self.token_budget, "users": len(self._prefixes),
+                    "tokens_saved_per_turn": self.counters["tokens_saved"] / turns if turns else 0.0}
@@ -0,0 +1,227 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+import numpy as np
+
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "10000"))
+# Optional directory that keeps embeddings across restarts; unset keeps them in RAM only
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "")
+# How long the first request of a batch waits for others to join it
+EMBED_BATCH_WINDOW_SECONDS = float(os.getenv("EMBED_BATCH_WINDOW_SECONDS", "0.01"))
+# Gemini's batch embedding endpoint accepts up to 100 texts per call
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "100"))
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace-insensitive form of text; mem0's embedders already turn newlines into spaces"""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """
+    LRU of embeddings keyed by the SHA-256 of (model, text).
+
+    With a directory, every embedding is also saved as a .npy file and RAM
+    misses are served from disk, so a restart does not re-embed common phrases.
+    """
+
+    def __init__(self, model: str, max_entries=EMBED_CACHE_MAX_ENTRIES, directory=EMBED_CACHE_DIR):
+        self.model = model
+        self.max_entries = max_entries
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key, vector):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, text: str):
+        key = self.key(text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return vector
+        if self.directory:
+            try:
+                vector = np.load(os.path.join(self.directory, f"{key}.npy")).tolist()
+            except (FileNotFoundError, ValueError, OSError):
+                vector = None
+            if vector is not None:
+                with self._lock:
+                    self._remember(key, vector)
+                    self.counters["disk_hits"] += 1
+                return vector
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, text: str, vector):
+        key = self.key(text)
+        with self._lock:
+            self._remember(key, vector)
+        if self.directory:
+            path = os.path.join(self.directory, f"{key}.npy")
+            # Save under a private name and rename, so readers never load a partial file
+            partial = f"{path}.{os.urandom(4).hex()}.part.npy"
+            try:
+                np.save(partial, np.asarray(vector, dtype=np.float32))
+                os.replace(partial, path)
+            except OSError as e:
+                print(f"[Embeddings] Could not persist embedding: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = sum(self.counters.values())
+            served = self.counters["hits"] + self.counters["disk_hits"]
+            return {**self.counters, "entries": len(self._entries), "max_entries": self.max_entries,
+                    "hit_rate": served / lookups if lookups else 0.0}
+
+
+class EmbeddingBatcher:
+    """
+    Collects embedding requests from many threads into batched calls.
+
+    The first request waits up to window seconds for others; everything
+    queued by then (at most max_batch texts) goes out as one
+    embed_many(texts) call. Identical texts waiting at the same time share
+    one slot in the batch.
+    """
+
+    def __init__(self, embed_many, window=EMBED_BATCH_WINDOW_SECONDS, max_batch=EMBED_MAX_BATCH):
+        self.embed_many = embed_many
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread = None
+        self.metrics = {"batches": 0, "texts": 0, "max_batch_size": 0, "failed_batches": 0}
+        self.batch_sizes = {}
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+            self._thread.start()
+
+    def embed(self, text: str):
+        """Embedding for text, computed in the next batch (blocking)"""
+        with self._cond:
+            self._ensure_started()
+            future = self._pending.get(text)
+            if future is None:
+                future = self._pending[text] = Future()
+                self._cond.notify_all()
+        return future.result()
+
+    def _take(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.window
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = []
+            while self._pending and len(batch) < self.max_batch:
+                batch.append(self._pending.popitem(last=False))
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            texts = [text for text, _ in batch]
+            try:
+                vectors = [list(vector) for vector in self.embed_many(texts)]
+                if len(vectors) != len(texts):
+                    # Pairing them up anyway would leave some callers waiting forever
+                    raise ValueError(f"Embedding backend returned {len(vectors)} vectors for {len(texts)} texts")
+            except Exception as e:
+                with self._cond:
+                    self.metrics["failed_batches"] += 1
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            with self._cond:
+                self.metrics["batches"] += 1
+                self.metrics["texts"] += len(texts)
+                self.metrics["max_batch_size"] = max(self.metrics["max_batch_size"], len(texts))
+                self.batch_sizes[len(texts)] = self.batch_sizes.get(len(texts), 0) + 1
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def stats(self):
+        with self._cond:
+            batches = self.metrics["batches"]
+            return {**self.metrics, "queued": len(self._pending),
+                    "avg_batch_size": self.metrics["texts"] / batches if batches else 0.0,
+                    "batch_sizes": dict(sorted(self.batch_sizes.items()))}
+
+
+def batch_embed_fn(embedder):
+    """
+    embed_many(texts) for a mem0 embedder.
+
+    mem0's Gemini embedder holds a google-genai client whose embed_content
+    takes a list of texts; other embedders fall back to one call per text.
+    """
+    models = getattr(getattr(embedder, "client", None), "models", None)
+    if models is None or not hasattr(models, "embed_content"):
+        return lambda texts: [embedder.embed(text) for text in texts]
+
+    def embed_many(texts):
+        from google.genai import types
+        dims = getattr(embedder.config, "embedding_dims", None)
+        config = types.EmbedContentConfig(output_dimensionality=dims) if dims else None
+        response = models.embed_content(model=embedder.config.model, contents=texts, config=config)
+        return [embedding.values for embedding in response.embeddings]
+
+    return embed_many
+
+
+class CachedEmbedder:
+    """
+    Drop-in replacement for mem0's memory.embedding_model.
+
+    Lookups go to the EmbeddingCache first; misses from all threads are
+    micro-batched into one embedding call. The Gemini embedder ignores
+    memory_action, so "add" and "search" embeddings of a text share an entry.
+    """
+
+    def __init__(self, embedder, embed_many=None, cache=None, batcher=None):
+        self.embedder = embedder
+        self.config = embedder.config
+        self.cache = cache or EmbeddingCache(getattr(embedder.config, "model", "") or "")
+        self.batcher = batcher or EmbeddingBatcher(embed_many or batch_embed_fn(embedder))
+
+    def embed(self, text, memory_action=None):
+        text = normalize_text(text)
+        vector = self.cache.get(text)
+        if vector is None:
+            vector = self.batcher.embed(text)
+            self.cache.put(text, vector)
+        return vector
+
+    def stats(self):
+        return {**self.cache.stats(), **self.batcher.stats()}
+
+
+def install(memory):
+    """Put a CachedEmbedder in front of a mem0 Memory's embedding model"""
+    if not isinstance(memory.embedding_model, CachedEmbedder):
+        memory.embedding_model = CachedEmbedder(memory.embedding_model)
+    return memory.embedding_model
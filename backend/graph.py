@@ -1,11 +1,6 @@
-from typing_extensions import TypedDict
-from typing import Annotated
-from langgraph.graph.message import add_messages
-from langchain_core.messages import SystemMessage
-from langgraph.graph import StateGraph, START, END
-from langchain.chat_models import init_chat_model
 from dotenv import load_dotenv
 import os
+import threading
 from qdrant_config import get_qdrant_client
 
 # Load environment variables
@@ -14,6 +9,9 @@ load_dotenv()
 # Initialize LLM with explicit API key from environment
 llm = None
 qdrant_client = None
+graph = None
+# langchain/langgraph take seconds to import; they load with the first get_llm()/get_graph()
+_graph_lock = threading.Lock()
 
 def get_llm():
     global llm
@@ -23,6 +21,7 @@ def get_llm():
         api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
             raise ValueError("GOOGLE_API_KEY not found in environment variables")
+        from langchain.chat_models import init_chat_model
         llm = init_chat_model(model_provider="google_genai", model="gemini-2.5-flash-lite", api_key=api_key)
     return llm
 
@@ -33,25 +32,64 @@ def get_qdrant():
         qdrant_client = get_qdrant_client()
     return qdrant_client
 
-class State(TypedDict):
-    messages: Annotated[list, add_messages]
-
-
-def chatbot(state: State):
-    system_prompt = SystemMessage(content="""You are a compassionate, professional, and empathetic therapist AI. 
+SYSTEM_PROMPT = """You are a compassionate, professional, and empathetic therapist AI. 
     You are capable of speaking any language. 
     ALWAYS detect the language of the user's last message and respond in the EXACT SAME language. 
     If the user speaks Hindi, respond in Hindi. If English, respond in English.
     Keep your responses concise, supportive, and grounded in therapeutic best practices (CBT/DBT techniques where appropriate).
-    Do not be judgmental. Be a good listener.""")
-    message = get_llm().invoke([system_prompt] + state["messages"])
+    Do not be judgmental. Be a good listener."""
+
+def build_graph():
+    from typing import Annotated
+    from typing_extensions import TypedDict, NotRequired
+    from langgraph.graph.message import add_messages
+    from langchain_core.messages import SystemMessage
+    from langgraph.graph import StateGraph, START, END
+
+    class State(TypedDict):
+        messages: Annotated[list, add_messages]
+        # SYSTEM_PROMPT plus the user's remembered context, assembled per turn
+        system_prompt: NotRequired[str]
+
+    def chatbot(state: State):
+        system_prompt = SystemMessage(content=state.get("system_prompt") or SYSTEM_PROMPT)
+        message = get_llm().invoke([system_prompt] + state["messages"])
+
+        return {"messages": message}
+
+    graph_builder = StateGraph(State)
+
+    graph_builder.add_node("chatbot", chatbot)
+    graph_builder.add_edge(START, "chatbot")
+    graph_builder.add_edge("chatbot", END)
+
+    return graph_builder.compile()
+
+def get_graph():
+    """Compiled chat graph, built on first use"""
+    global graph
+    if graph is None:
+        with _graph_lock:
+            if graph is None:
+                graph = build_graph()
+    return graph
 
-    return {"messages": message}
 
-graph_builder = StateGraph(State)
+def message_text(content) -> str:
+    """Text of a message/chunk content, which some providers send as a list of parts"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+    return ""
 
-graph_builder.add_node("chatbot", chatbot)
-graph_builder.add_edge(START, "chatbot")
-graph_builder.add_edge("chatbot", END)
 
-graph = graph_builder.compile()
\ No newline at end of file
+async def astream_reply(inputs):
+    """Yield the chatbot's reply as text deltas while the LLM is still generating"""
+    # "messages" mode surfaces the LLM tokens from inside the chatbot node
+    async for chunk, metadata in get_graph().astream(inputs, stream_mode="messages"):
+        if metadata.get("langgraph_node") != "chatbot":
+            continue
+        text = message_text(chunk.content)
+        if text:
+            yield text
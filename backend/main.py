@@ -1,6 +1,6 @@
 from dotenv import load_dotenv
 import speech_recognition as sr
-from graph import graph
+from graph import get_graph
 from gtts import gTTS
 import pygame
 import os
@@ -49,7 +49,7 @@ def main():
                 messages.append({"role": "user", "content": user_message})
                 
                 response_text = None
-                for event in graph.stream({"messages": messages}, stream_mode="values"):
+                for event in get_graph().stream({"messages": messages}, stream_mode="values"):
                     if "messages" in event:
                         last_message = event["messages"][-1]
                         # Only process assistant messages
@@ -0,0 +1,77 @@
+import re
+from fastapi import Request
+from fastapi.responses import Response
+
+# Clips are content-addressed, so a URL's bytes never change
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: str, size: int):
+    """
+    (start, end) inclusive for a single "bytes=" range, None to send the whole
+    body (absent, multi-range, malformed or last < first), or ValueError if unsatisfiable.
+    """
+    match = RANGE_HEADER.match(header.strip()) if header else None
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        # Invalid range spec (RFC 9110 14.1.1): the header is ignored
+        return None
+    if start >= size:
+        raise ValueError("range not satisfiable")
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def media_headers(etag: str):
+    return {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL, "Accept-Ranges": "bytes"}
+
+
+def not_modified(request: Request, etag: str):
+    """304 response if the client already holds etag, else None; needs no body, so call it before loading one"""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=media_headers(etag))
+    return None
+
+
+def media_response(request: Request, data: bytes, etag: str, media_type: str) -> Response:
+    """Serve an immutable in-memory body with conditional GET and single byte-range support"""
+    headers = media_headers(etag)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    size = len(data)
+    range_header = request.headers.get("range")
+    # A stale If-Range means the client's partial copy is outdated: send everything
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if byte_range is None:
+        return Response(content=data, media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(content=data[start:end + 1], status_code=206, media_type=media_type, headers=headers)
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from qdrant_client.models import Filter, FieldCondition, MatchValue
+
+# How long a user's cached memories are trusted before re-reading Qdrant
+MEMORY_CACHE_TTL_SECONDS = float(os.getenv("MEMORY_CACHE_TTL_SECONDS", "300"))
+MEMORY_CACHE_MAX_USERS = int(os.getenv("MEMORY_CACHE_MAX_USERS", "500"))
+# Users with more memories than this always search Qdrant
+MEMORY_CACHE_MAX_ITEMS = int(os.getenv("MEMORY_CACHE_MAX_ITEMS", "500"))
+# Same default limit mem0's Memory.search uses
+MEMORY_SEARCH_LIMIT = 100
+
+
+class UserMemories:
+    """
+    One user's memories: payloads plus an L2-normalized (n, dims) float32 matrix.
+
+    An oversized entry holds nothing; it only records that the user has more
+    than max_items memories, so searches go straight to mem0 without a scroll.
+    """
+
+    def __init__(self, items, vectors, oversized=False):
+        self.items = items
+        self.matrix = vectors
+        self.oversized = oversized
+        self.loaded_at = time.monotonic()
+
+    def search(self, query_vector, limit):
+        if not self.items:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        scores = self.matrix @ query
+        top = np.argsort(-scores)[:limit]
+        return [{**self.items[i], "score": float(scores[i])} for i in top]
+
+
+class MemoryCache:
+    """
+    Per-user, in-process cache in front of mem0's memory.search.
+
+    A user's memories and their embeddings are pulled from the vector store
+    once and kept until MEMORY_CACHE_TTL_SECONDS pass or invalidate() is called
+    (the memory writer does so after every write). Searches then only need the
+    query embedding; ranking is a cosine top-k over the cached matrix, which
+    matches Qdrant's cosine scoring.
+    """
+
+    def __init__(self, get_memory, ttl=MEMORY_CACHE_TTL_SECONDS, max_users=MEMORY_CACHE_MAX_USERS,
+                 max_items=MEMORY_CACHE_MAX_ITEMS):
+        # Called on use, so the mem0 instance can be created lazily
+        self.get_memory = get_memory
+        self.ttl = ttl
+        self.max_users = max_users
+        self.max_items = max_items
+        self._users = OrderedDict()
+        # Bumped by invalidate(), so a load that started before a write is not cached
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "fallbacks": 0, "invalidations": 0}
+
+    def _load(self, user_id: str):
+        store = self.get_memory().vector_store
+        points, _ = store.client.scroll(
+            collection_name=store.collection_name,
+            scroll_filter=Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))]),
+            limit=self.max_items + 1,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if len(points) > self.max_items:
+            return UserMemories([], None, oversized=True)
+
+        items, vectors = [], []
+        for point in points:
+            payload = point.payload or {}
+            items.append({
+                "id": str(point.id),
+                "memory": payload.get("data", ""),
+                "created_at": payload.get("created_at"),
+                "updated_at": payload.get("updated_at"),
+                "user_id": user_id,
+            })
+            vectors.append(point.vector)
+        if not vectors:
+            # New or emptied user: cache that there is nothing to search
+            return UserMemories(items, np.zeros((0, getattr(store, "embedding_model_dims", 0) or 0), np.float32))
+        matrix = np.asarray(vectors, dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        return UserMemories(items, matrix)
+
+    def get(self, user_id: str):
+        """Cached memories for user_id, loading them on a miss; None if the user is too big to cache (also cached)"""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and time.monotonic() - entry.loaded_at < self.ttl:
+                self._users.move_to_end(user_id)
+                self.counters["hits"] += 1
+                return None if entry.oversized else entry
+            self.counters["misses"] += 1
+            generation = self._generations.get(user_id, 0)
+
+        entry = self._load(user_id)
+        with self._lock:
+            # Invalidated while loading: serve this result but let the next get reload
+            if self._generations.get(user_id, 0) == generation:
+                self._users[user_id] = entry
+                self._users.move_to_end(user_id)
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+        return None if entry.oversized else entry
+
+    def prefetch(self, user_id: str):
+        """Load a user's memories ahead of their first search (blocking)"""
+        try:
+            self.get(user_id)
+        except Exception as e:
+            print(f"[Memory] Prefetch for {user_id} failed: {e}")
+
+    def search(self, query: str, user_id: str, limit: int = MEMORY_SEARCH_LIMIT):
+        """Same result shape as memory.search; falls back to it if the cache cannot serve the user"""
+        try:
+            entry = self.get(user_id)
+        except Exception as e:
+            print(f"[Memory] Cache load for {user_id} failed, using remote search: {e}")
+            entry = None
+        if entry is None:
+            with self._lock:
+                self.counters["fallbacks"] += 1
+            return self.get_memory().search(query, user_id=user_id, limit=limit)
+        if not entry.items:
+            return {"results": []}
+        query_vector = self.get_memory().embedding_model.embed(query, "search")
+        return {"results": entry.search(query_vector, limit)}
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            if self._users.pop(user_id, None) is not None:
+                self.counters["invalidations"] += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, "users": len(self._users)}
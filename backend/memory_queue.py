@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from timing import Timeline
+from metrics import stage_seconds
+
+# Turns waiting to be written, across all users; further turns are rejected
+MEMORY_QUEUE_SIZE = int(os.getenv("MEMORY_QUEUE_SIZE", "1000"))
+MEMORY_WORKERS = int(os.getenv("MEMORY_WORKERS", "2"))
+# How long a user's first pending turn waits for more turns to batch with it
+MEMORY_COALESCE_SECONDS = float(os.getenv("MEMORY_COALESCE_SECONDS", "3"))
+MEMORY_MAX_TURNS_PER_WRITE = int(os.getenv("MEMORY_MAX_TURNS_PER_WRITE", "8"))
+MEMORY_MAX_RETRIES = int(os.getenv("MEMORY_MAX_RETRIES", "3"))
+MEMORY_RETRY_BACKOFF_SECONDS = float(os.getenv("MEMORY_RETRY_BACKOFF_SECONDS", "0.5"))
+MEMORY_DRAIN_SECONDS = float(os.getenv("MEMORY_DRAIN_SECONDS", "30"))
+
+
+class MemoryQueueFull(Exception):
+    """The write queue is at MEMORY_QUEUE_SIZE"""
+
+
+class MemoryWriter:
+    """
+    Bounded background writer for conversation memories.
+
+    Turns are queued per user. A worker picks a user once their oldest turn
+    has waited MEMORY_COALESCE_SECONDS (or MEMORY_MAX_TURNS_PER_WRITE turns
+    piled up) and stores all of them with one write_fn(conversation, user_id)
+    call, retrying failures with exponential backoff. A user is only ever
+    handled by one worker at a time, so their turns are written in order.
+    """
+
+    def __init__(self, write_fn, workers=MEMORY_WORKERS, max_pending=MEMORY_QUEUE_SIZE,
+                 coalesce_seconds=MEMORY_COALESCE_SECONDS, max_turns=MEMORY_MAX_TURNS_PER_WRITE,
+                 max_retries=MEMORY_MAX_RETRIES, on_written=None):
+        self.write_fn = write_fn
+        self.workers = workers
+        self.max_pending = max_pending
+        self.coalesce_seconds = coalesce_seconds
+        self.max_turns = max_turns
+        self.max_retries = max_retries
+        # Called with user_id after a successful write (e.g. to invalidate caches)
+        self.on_written = on_written
+        self._pending = OrderedDict()
+        self._depth = 0
+        self._busy_users = set()
+        self._closing = False
+        self._threads = []
+        self._cond = threading.Condition()
+        self.metrics = {"enqueued": 0, "rejected": 0, "writes": 0, "turns_written": 0, "retries": 0,
+                        "failed_writes": 0, "turns_lost": 0, "write_seconds_total": 0.0, "write_seconds_max": 0.0}
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"memory-writer-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, user_id: str, transcript: str, response_text: str, timeout: float = 0.0):
+        """Queue a turn; waits up to timeout for room, then raises MemoryQueueFull"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._depth >= self.max_pending and not self._closing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.metrics["rejected"] += 1
+                    raise MemoryQueueFull(f"{self._depth} memory writes pending")
+                self._cond.wait(remaining)
+            if self._closing:
+                raise MemoryQueueFull("memory writer is shutting down")
+            self._pending.setdefault(user_id, []).append((transcript, response_text, time.monotonic()))
+            self._depth += 1
+            self.metrics["enqueued"] += 1
+            self._cond.notify_all()
+
+    def _next_ready(self, now):
+        """(user_id, seconds until someone is ready) under the lock"""
+        wait = None
+        for user_id, turns in self._pending.items():
+            if user_id in self._busy_users:
+                continue
+            ready_in = turns[0][2] + self.coalesce_seconds - now
+            if self._closing or ready_in <= 0 or len(turns) >= self.max_turns:
+                return user_id, 0
+            wait = ready_in if wait is None else min(wait, ready_in)
+        return None, wait
+
+    def _take(self):
+        with self._cond:
+            while True:
+                user_id, wait = self._next_ready(time.monotonic())
+                if user_id is not None:
+                    turns = self._pending[user_id][:self.max_turns]
+                    rest = self._pending[user_id][self.max_turns:]
+                    if rest:
+                        self._pending[user_id] = rest
+                    else:
+                        del self._pending[user_id]
+                    self._depth -= len(turns)
+                    self._busy_users.add(user_id)
+                    # Room freed up for blocked submitters
+                    self._cond.notify_all()
+                    return user_id, turns
+                if self._closing and not self._pending:
+                    return None, None
+                self._cond.wait(wait)
+
+    def _run(self):
+        while True:
+            user_id, turns = self._take()
+            if user_id is None:
+                return
+            try:
+                self._write(user_id, turns)
+            finally:
+                with self._cond:
+                    self._busy_users.discard(user_id)
+                    self._cond.notify_all()
+
+    def _write(self, user_id, turns):
+        conversation = "\n".join(f"User: {transcript}\nAssistant: {response_text}"
+                                 for transcript, response_text, _ in turns)
+        # Queue wait of the oldest turn and each write attempt land in the stage histograms
+        stage_seconds.observe(time.monotonic() - turns[0][2], pipeline="memory-write", stage="queued")
+        timeline = Timeline("memory-write")
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                with timeline.span("memory_add"):
+                    self.write_fn(conversation, user_id)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"[Memory] Giving up on {len(turns)} turn(s) for {user_id}: {e}")
+                    with self._cond:
+                        self.metrics["failed_writes"] += 1
+                        self.metrics["turns_lost"] += len(turns)
+                    return
+                print(f"[Memory] Write for {user_id} failed (attempt {attempt + 1}), retrying: {e}")
+                with self._cond:
+                    self.metrics["retries"] += 1
+                time.sleep(MEMORY_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+                continue
+
+            elapsed = time.perf_counter() - start
+            with self._cond:
+                self.metrics["writes"] += 1
+                self.metrics["turns_written"] += len(turns)
+                self.metrics["write_seconds_total"] += elapsed
+                self.metrics["write_seconds_max"] = max(self.metrics["write_seconds_max"], elapsed)
+            if self.on_written is not None:
+                self.on_written(user_id)
+            return
+
+    def drain(self, timeout: float = MEMORY_DRAIN_SECONDS):
+        """Stop accepting turns, flush everything queued and wait for the workers"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        with self._cond:
+            if self._depth:
+                print(f"[Memory] Shutdown left {self._depth} turn(s) unwritten")
+
+    def stats(self):
+        with self._cond:
+            writes = self.metrics["writes"]
+            return {
+                **self.metrics,
+                "queue_depth": self._depth,
+                "users_pending": len(self._pending),
+                "writes_in_flight": len(self._busy_users),
+                "write_seconds_avg": self.metrics["write_seconds_total"] / writes if writes else 0.0,
+            }
@@ -0,0 +1,54 @@
+import threading
+from qdrant_config import mem0_vector_store_config
+import embeddings
+
+# Initialize Mem0 with Gemini embeddings and a Qdrant vector store
+config = {
+    "llm": {
+        "provider": "gemini",
+        "config": {
+            "model": "gemini-2.5-flash",
+            "temperature": 0.7
+        }
+    },
+    "embedder": {
+        "provider": "gemini",
+        "config": {
+            "model": "models/text-embedding-004"
+        }
+    },
+}
+COLLECTION_NAME = "avacare_memories_v4"
+# Gemini text-embedding-004 uses 768 dimensions
+EMBEDDING_DIMS = 768
+
+memory = None
+_memory_lock = threading.Lock()
+
+def get_memory():
+    """
+    mem0 Memory, built on first use.
+
+    Importing mem0 and connecting its vector store takes seconds, so this
+    happens during startup warm-up (or the first request), not at import.
+    """
+    global memory
+    if memory is None:
+        with _memory_lock:
+            if memory is None:
+                from mem0 import Memory
+                # Qdrant Cloud, or embedded on-disk Qdrant when QDRANT_PATH is set
+                instance = Memory.from_config({
+                    **config,
+                    "vector_store": mem0_vector_store_config(COLLECTION_NAME, EMBEDDING_DIMS),
+                })
+                # Cache and micro-batch Gemini embedding calls made by memory.add/search
+                embeddings.install(instance)
+                memory = instance
+    return memory
+
+def embedding_stats():
+    """Embedding cache counters, or None before the memory store is loaded"""
+    if memory is None:
+        return None
+    return memory.embedding_model.stats()
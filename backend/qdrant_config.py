@@ -1,36 +1,70 @@
 from qdrant_client import QdrantClient
 from dotenv import load_dotenv
 import os
+import threading
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Qdrant Cloud client
+# Set to a directory to keep memories in an embedded, on-disk Qdrant instead of Qdrant Cloud
+QDRANT_PATH = os.getenv("QDRANT_PATH", "")
+
+# Initialize Qdrant client
 qdrant_client = None
+# Startup warms clients from several threads; only one may open the client
+_client_lock = threading.Lock()
+
+def is_local():
+    return bool(QDRANT_PATH)
 
 def get_qdrant_client():
-    """Get or create Qdrant client instance"""
+    """Get or create Qdrant client instance (embedded local mode when QDRANT_PATH is set, else Qdrant Cloud)"""
     global qdrant_client
-    if qdrant_client is None:
+    if qdrant_client is not None:
+        return qdrant_client
+    with _client_lock:
+        if qdrant_client is not None:
+            return qdrant_client
+        if is_local():
+            # Embedded mode runs in-process and locks the directory, so this
+            # client must be the only one opened on it (mem0 reuses it)
+            os.makedirs(QDRANT_PATH, exist_ok=True)
+            qdrant_client = QdrantClient(path=QDRANT_PATH)
+            return qdrant_client
+
         url = os.getenv("QDRANT_URL")
         api_key = os.getenv("QDRANT_API_KEY")
         
         if not url or not api_key:
-            raise ValueError("QDRANT_URL and QDRANT_API_KEY must be set in environment variables")
+            raise ValueError("QDRANT_URL and QDRANT_API_KEY must be set in environment variables (or QDRANT_PATH for local mode)")
         
-        qdrant_client = QdrantClient(
+        client = QdrantClient(
             url=url,
             api_key=api_key,
         )
         
-        # Test connection
-        try:
-            collections = qdrant_client.get_collections()
-        except Exception as e:
-            raise
+        # Test connection; a failed one is not kept, so the next call retries
+        client.get_collections()
+        qdrant_client = client
     
     return qdrant_client
 
+def mem0_vector_store_config(collection_name: str, embedding_model_dims: int):
+    """mem0 "vector_store" section that reuses the shared client, local or cloud"""
+    # mem0 validates that a location is given even when a client is passed
+    location = {"path": QDRANT_PATH} if is_local() else {"url": os.getenv("QDRANT_URL"), "api_key": os.getenv("QDRANT_API_KEY")}
+    return {
+        "provider": "qdrant",
+        "config": {
+            "collection_name": collection_name,
+            "client": get_qdrant_client(),
+            "embedding_model_dims": embedding_model_dims,
+            # Local collections keep their vectors on disk rather than in RAM
+            "on_disk": is_local(),
+            **location,
+        }
+    }
+
 # Initialize on module import
 if __name__ == "__main__":
     client = get_qdrant_client()
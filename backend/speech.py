@@ -0,0 +1,164 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+import numpy as np
+import speech_recognition as sr
+
+# Languages tried for every utterance, in order of preference on a tie
+ASR_LANGUAGES = [lang.strip() for lang in os.getenv("ASR_LANGUAGES", "en-US,hi-IN").split(",") if lang.strip()]
+# Total time budget for one recognition, however many languages are in flight
+ASR_DEADLINE_SECONDS = float(os.getenv("ASR_DEADLINE_SECONDS", "8"))
+ASR_MAX_CONCURRENCY = int(os.getenv("ASR_MAX_CONCURRENCY", "16"))
+# "google" (web API) or "whisper" (local faster-whisper model)
+ASR_ENGINE = os.getenv("ASR_ENGINE", "google")
+ASR_WHISPER_MODEL = os.getenv("ASR_WHISPER_MODEL", "small")
+ASR_WHISPER_COMPUTE_TYPE = os.getenv("ASR_WHISPER_COMPUTE_TYPE", "int8")
+# CPU threads per utterance, and utterances decoded in parallel, for the local engine
+ASR_THREADS = int(os.getenv("ASR_THREADS", "4"))
+ASR_WORKERS = int(os.getenv("ASR_WORKERS", "1"))
+
+
+class Hypothesis(NamedTuple):
+    transcript: str
+    confidence: float
+    language: str
+
+
+class GoogleEngine:
+    """speech_recognition's Google Web Speech API (one blocking HTTP call per language)"""
+
+    name = "google"
+    # Needs one call per candidate language
+    multilingual = False
+
+    def recognize(self, audio_data: sr.AudioData, language: str) -> Optional[Hypothesis]:
+        result = sr.Recognizer().recognize_google(audio_data, language=language, show_all=True)
+        if not isinstance(result, dict) or not result.get("alternative"):
+            return None
+        best = result["alternative"][0]
+        transcript = best.get("transcript", "")
+        if not transcript:
+            return None
+        return Hypothesis(transcript, float(best.get("confidence", 0.0)), language)
+
+    def recognize_batch(self, audios, language: str):
+        return [self.recognize(audio_data, language) for audio_data in audios]
+
+
+class WhisperEngine:
+    """
+    Local CPU recognition with a quantized faster-whisper model.
+
+    The model is loaded once per process and detects the language itself, so
+    the stage makes a single call per utterance. ASR_WORKERS utterances can be
+    decoded in parallel, each using ASR_THREADS CPU threads.
+    """
+
+    name = "whisper"
+    multilingual = True
+
+    def __init__(self, model_size=ASR_WHISPER_MODEL, compute_type=ASR_WHISPER_COMPUTE_TYPE,
+                 threads=ASR_THREADS, workers=ASR_WORKERS):
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.threads = threads
+        self.workers = workers
+        self._model = None
+        self._lock = threading.Lock()
+        self._batch_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="whisper")
+
+    @property
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                try:
+                    from faster_whisper import WhisperModel
+                except ImportError:
+                    raise RuntimeError("ASR_ENGINE=whisper needs the faster-whisper package (pip install faster-whisper)")
+                self._model = WhisperModel(self.model_size, device="cpu", compute_type=self.compute_type,
+                                           cpu_threads=self.threads, num_workers=self.workers)
+            return self._model
+
+    def warm_up(self):
+        return self.model
+
+    def recognize(self, audio_data: sr.AudioData, language: Optional[str] = None) -> Optional[Hypothesis]:
+        pcm = audio_data.get_raw_data(convert_rate=16000, convert_width=2)
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        # Whisper takes bare language codes ("hi", not "hi-IN")
+        code = language.split("-")[0] if language else None
+        segments, info = self.model.transcribe(samples, language=code, beam_size=1)
+        segments = list(segments)
+        transcript = "".join(segment.text for segment in segments).strip()
+        if not transcript:
+            return None
+        confidence = float(np.exp(np.mean([segment.avg_logprob for segment in segments])))
+        return Hypothesis(transcript, confidence, language or info.language)
+
+    def recognize_batch(self, audios, language: Optional[str] = None):
+        """Decode several utterances concurrently on the shared model"""
+        return list(self._batch_executor.map(lambda audio_data: self.recognize(audio_data, language), audios))
+
+
+ENGINES = {"google": GoogleEngine, "whisper": WhisperEngine}
+
+
+def make_engine(name: str = ASR_ENGINE):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown ASR_ENGINE {name!r}, expected one of {sorted(ENGINES)}")
+    return ENGINES[name]()
+
+
+class RecognitionStage:
+    """
+    Sends every candidate language to the engine at once and keeps the most
+    confident transcript that arrives before the deadline.
+
+    The engine is anything with recognize(audio_data, language) -> Hypothesis
+    or None that raises sr.RequestError on service failures, so tests and
+    benchmarks can swap in a local stub. Engines with multilingual = True
+    detect the language themselves and get a single call with language=None.
+    """
+
+    def __init__(self, engine=None, languages=None, deadline=ASR_DEADLINE_SECONDS):
+        self.engine = engine or make_engine()
+        self.languages = languages or ASR_LANGUAGES
+        self.deadline = deadline
+        self.executor = ThreadPoolExecutor(max_workers=ASR_MAX_CONCURRENCY, thread_name_prefix="asr")
+
+    async def recognize(self, audio_data: sr.AudioData) -> Optional[Hypothesis]:
+        """Best hypothesis across languages, None if nothing was heard; raises sr.RequestError if no call answered in time"""
+        languages = [None] if getattr(self.engine, "multilingual", False) else self.languages
+        tasks = [
+            asyncio.wrap_future(self.executor.submit(self.engine.recognize, audio_data, language))
+            for language in languages
+        ]
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+
+        best, errors, answered = None, [], 0
+        # Iterate in language order so earlier languages win ties
+        for task in tasks:
+            if task not in done:
+                continue
+            try:
+                hypothesis = task.result()
+            except sr.RequestError as e:
+                errors.append(e)
+                continue
+            answered += 1
+            if hypothesis and (best is None or hypothesis.confidence > best.confidence):
+                best = hypothesis
+
+        if not answered:
+            # Every call failed or ran out of time: that is a service problem, not silence
+            if errors:
+                raise errors[0]
+            raise sr.RequestError(f"No recognition result within {self.deadline} s")
+        return best
+
+
+recognition = RecognitionStage()
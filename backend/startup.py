@@ -0,0 +1,77 @@
+import asyncio
+import inspect
+import os
+import time
+from fastapi.concurrency import run_in_threadpool
+
+# A component still warming after this long is marked failed (its client retries lazily on use)
+WARM_UP_TIMEOUT_SECONDS = float(os.getenv("WARM_UP_TIMEOUT_SECONDS", "60"))
+# Pause between attempts to warm required components that failed
+WARM_UP_RETRY_SECONDS = float(os.getenv("WARM_UP_RETRY_SECONDS", "10"))
+
+
+class Readiness:
+    """
+    Warms the app's clients and models concurrently and tracks their state.
+
+    Each component is a function (sync ones run in the threadpool) that loads
+    or connects something. warm_up() starts them all at once, records how long
+    each took, and keeps retrying failed required ones in the background.
+    The app is ready once every required component has warmed up; optional
+    ones only show up in the report.
+    """
+
+    def __init__(self, timeout=WARM_UP_TIMEOUT_SECONDS, retry_seconds=WARM_UP_RETRY_SECONDS):
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self.started = time.perf_counter()
+        self._components = {}
+
+    def register(self, name: str, warm, required: bool = True):
+        self._components[name] = {"warm": warm, "required": required, "status": "pending",
+                                  "attempts": 0, "duration_ms": None, "error": None}
+
+    async def _warm(self, name: str):
+        component = self._components[name]
+        component["status"] = "warming"
+        component["attempts"] += 1
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(component["warm"]):
+                work = component["warm"]()
+            else:
+                work = run_in_threadpool(component["warm"])
+            await asyncio.wait_for(work, self.timeout)
+        except Exception as e:
+            component.update(status="failed", error=f"{type(e).__name__}: {e}")
+            print(f"[Startup] {name} failed after {time.perf_counter() - start:.2f} s: {e}")
+        else:
+            component.update(status="ready", error=None)
+            print(f"[Startup] {name} ready in {time.perf_counter() - start:.2f} s")
+        finally:
+            component["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    def _failed(self, required_only: bool):
+        return [name for name, component in self._components.items()
+                if component["status"] == "failed" and (component["required"] or not required_only)]
+
+    async def warm_up(self):
+        await asyncio.gather(*(self._warm(name) for name in self._components))
+        print(f"[Startup] Warm-up finished in {time.perf_counter() - self.started:.2f} s")
+        while self._failed(required_only=True):
+            await asyncio.sleep(self.retry_seconds)
+            await asyncio.gather(*(self._warm(name) for name in self._failed(required_only=True)))
+
+    def ready(self) -> bool:
+        return all(component["status"] == "ready"
+                   for component in self._components.values() if component["required"])
+
+    def report(self):
+        return {
+            "ready": self.ready(),
+            "uptime_s": round(time.perf_counter() - self.started, 1),
+            "components": {
+                name: {key: value for key, value in component.items() if key != "warm"}
+                for name, component in self._components.items()
+            },
+        }
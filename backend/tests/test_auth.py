@@ -0,0 +1,23 @@
+from auth import PrincipalCache, User
+
+
+def test_invalidate_user_drops_every_token():
+    cache = PrincipalCache()
+    cache.put("t1", User(username="amy"))
+    cache.put("t2", User(username="amy"))
+    cache.put("t3", User(username="bob"))
+    cache.invalidate_user("amy")
+    assert cache.get("t1") is None and cache.get("t2") is None
+    assert cache.get("t3").username == "bob"
+
+
+def test_invalidate_during_load_discards_stale_principal():
+    cache = PrincipalCache()
+    generation = cache.generation("amy")
+    # The account is disabled while the old document is still being read
+    cache.invalidate_user("amy")
+    cache.put("t1", User(username="amy", disabled=False), generation=generation)
+    assert cache.get("t1") is None
+
+    cache.put("t1", User(username="amy", disabled=True), generation=cache.generation("amy"))
+    assert cache.get("t1").disabled
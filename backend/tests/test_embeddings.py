@@ -0,0 +1,90 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from embeddings import CachedEmbedder, EmbeddingBatcher, EmbeddingCache
+
+
+class RecordingBackend:
+    """embed_many stand-in that records every call"""
+
+    def __init__(self, drop=0):
+        self.calls = []
+        self.drop = drop
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+        vectors = [[float(len(text)), 1.0] for text in texts]
+        return vectors[:len(vectors) - self.drop]
+
+
+def make_embedder(backend, window=0.05, **cache_args):
+    embedder = SimpleNamespace(config=SimpleNamespace(model="test-model"))
+    cache = EmbeddingCache("test-model", **cache_args)
+    return CachedEmbedder(embedder, cache=cache, batcher=EmbeddingBatcher(backend, window=window))
+
+
+def test_repeat_text_is_served_from_cache():
+    backend = RecordingBackend()
+    embedder = make_embedder(backend)
+    first = embedder.embed("I feel tired", "add")
+    # Whitespace differences normalize to the same entry
+    assert embedder.embed("I  feel\ntired", "search") == first
+    assert backend.calls == [["I feel tired"]]
+    stats = embedder.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = EmbeddingCache("m", max_entries=2, directory="")
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert cache.get("a") == [1.0]
+    cache.put("c", [3.0])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.get("c") == [3.0]
+
+
+def test_disk_cache_survives_a_new_instance(tmp_path):
+    EmbeddingCache("m", directory=str(tmp_path)).put("hello", [0.5, 0.25])
+    cache = EmbeddingCache("m", directory=str(tmp_path))
+    assert cache.get("hello") == [0.5, 0.25]
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_concurrent_requests_share_one_batch():
+    backend = RecordingBackend()
+    batcher = EmbeddingBatcher(backend, window=0.2)
+    texts = ["one", "two", "three", "two"]
+    with ThreadPoolExecutor(len(texts)) as pool:
+        vectors = list(pool.map(batcher.embed, texts))
+    assert vectors == [[3.0, 1.0], [3.0, 1.0], [5.0, 1.0], [3.0, 1.0]]
+    assert len(backend.calls) == 1
+    assert sorted(backend.calls[0]) == ["one", "three", "two"]
+    assert batcher.stats()["max_batch_size"] == 3
+
+
+def test_max_batch_splits_calls():
+    backend = RecordingBackend()
+    batcher = EmbeddingBatcher(backend, window=0.2, max_batch=2)
+    with ThreadPoolExecutor(5) as pool:
+        list(pool.map(batcher.embed, ["a", "bb", "ccc", "dddd", "eeeee"]))
+    assert all(len(call) <= 2 for call in backend.calls)
+    assert sorted(text for call in backend.calls for text in call) == ["a", "bb", "ccc", "dddd", "eeeee"]
+
+
+def test_short_response_fails_every_caller():
+    backend = RecordingBackend(drop=1)
+    batcher = EmbeddingBatcher(backend, window=0.2)
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(batcher.embed, text) for text in ["a", "b", "c"]]
+        for future in futures:
+            with pytest.raises(ValueError, match="2 vectors for 3 texts"):
+                # Would hang without the length check
+                future.result(timeout=5)
+    assert batcher.stats()["failed_batches"] == 1
@@ -0,0 +1,33 @@
+import pytest
+from starlette.requests import Request
+
+from media import not_modified, parse_range
+
+
+def test_single_ranges():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=90-500", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+
+
+def test_ignored_headers_send_the_whole_body():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("bytes=-", 100) is None
+    # last < first is an invalid spec, not an unsatisfiable one
+    assert parse_range("bytes=5-2", 100) is None
+
+
+def test_start_past_the_end_is_unsatisfiable():
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+    with pytest.raises(ValueError):
+        parse_range("bytes=150-200", 100)
+
+
+def test_not_modified_only_for_a_matching_etag():
+    request = Request({"type": "http", "headers": [(b"if-none-match", b'W/"aa", "bb"')]})
+    assert not_modified(request, '"bb"').status_code == 304
+    assert not_modified(request, '"cc"') is None
+    assert not_modified(Request({"type": "http", "headers": []}), '"bb"') is None
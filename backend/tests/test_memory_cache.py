@@ -0,0 +1,99 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from memory_cache import MemoryCache
+
+
+class FakeStoreClient:
+    def __init__(self, points):
+        self.points = points
+        self.scrolls = 0
+
+    def scroll(self, collection_name, scroll_filter, limit, with_payload, with_vectors):
+        self.scrolls += 1
+        user_id = scroll_filter.must[0].match.value
+        return list(self.points.get(user_id, [])), None
+
+
+class FakeEmbedder:
+    def embed(self, text, memory_action=None):
+        return [1.0, 0.0, 0.0]
+
+
+def make_memory(points):
+    client = FakeStoreClient(points)
+    memory = SimpleNamespace(
+        vector_store=SimpleNamespace(client=client, collection_name="test", embedding_model_dims=3),
+        embedding_model=FakeEmbedder(),
+        search=lambda query, user_id, limit: {"results": [{"memory": "remote"}]},
+    )
+    return memory, client
+
+
+def point(point_id, text, vector):
+    return SimpleNamespace(id=point_id, payload={"data": text}, vector=vector)
+
+
+def test_empty_user_is_cached_without_remote_fallback():
+    memory, client = make_memory({})
+    cache = MemoryCache(lambda: memory)
+
+    assert cache.search("hello", user_id="new") == {"results": []}
+    assert cache.search("hello", user_id="new") == {"results": []}
+    assert client.scrolls == 1
+    assert cache.stats()["fallbacks"] == 0
+    assert cache.get("new").matrix.shape == (0, 3)
+
+
+def test_search_ranks_by_cosine():
+    memory, _ = make_memory({"u": [point(1, "tea", [0.0, 1.0, 0.0]), point(2, "dog", [2.0, 0.1, 0.0])]})
+    cache = MemoryCache(lambda: memory)
+
+    results = cache.search("pets", user_id="u")["results"]
+    assert [r["memory"] for r in results] == ["dog", "tea"]
+    assert np.isclose(results[0]["score"], 2.0 / np.linalg.norm([2.0, 0.1]))
+
+
+def test_invalidate_during_load_discards_stale_entry():
+    points = {"u": [point(1, "old", [1.0, 0.0, 0.0])]}
+    memory, client = make_memory(points)
+    cache = MemoryCache(lambda: memory)
+    loading, release = threading.Event(), threading.Event()
+    original_scroll = client.scroll
+
+    def slow_scroll(**kwargs):
+        result = original_scroll(**kwargs)
+        loading.set()
+        release.wait(5)
+        return result
+
+    client.scroll = slow_scroll
+    reader = threading.Thread(target=cache.get, args=("u",))
+    reader.start()
+    loading.wait(5)
+    # A write lands while the (now stale) load is in flight
+    points["u"] = points["u"] + [point(2, "new", [0.0, 1.0, 0.0])]
+    cache.invalidate("u")
+    release.set()
+    reader.join(5)
+
+    client.scroll = original_scroll
+    assert [item["memory"] for item in cache.get("u").items] == ["old", "new"]
+
+
+def test_oversized_user_is_remembered_and_searched_remotely():
+    memory, client = make_memory({"big": [point(i, f"m{i}", [1.0, 0.0, 0.0]) for i in range(3)]})
+    cache = MemoryCache(lambda: memory, max_items=2)
+
+    for _ in range(3):
+        cache.prefetch("big")
+        assert cache.search("hello", user_id="big") == {"results": [{"memory": "remote"}]}
+    assert client.scrolls == 1
+    assert cache.stats()["fallbacks"] == 3
+
+    # A write may have shrunk the user; the marker goes like any other entry
+    cache.invalidate("big")
+    cache.search("hello", user_id="big")
+    assert client.scrolls == 2
@@ -0,0 +1,59 @@
+import asyncio
+import threading
+
+import pytest
+import speech_recognition as sr
+
+from speech import Hypothesis, RecognitionStage
+
+AUDIO = sr.AudioData(b"\0\0" * 1600, 16000, 2)
+
+
+class StubEngine:
+    """Per-language behaviour: a Hypothesis, None, an exception, or "hang" (blocks until released)"""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.release = threading.Event()
+
+    def recognize(self, audio_data, language=None):
+        outcome = self.outcomes[language]
+        if outcome == "hang":
+            self.release.wait(5)
+            return None
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def recognize(outcomes, deadline=0.2):
+    engine = StubEngine(outcomes)
+    stage = RecognitionStage(engine, languages=list(outcomes), deadline=deadline)
+    try:
+        return asyncio.run(stage.recognize(AUDIO))
+    finally:
+        engine.release.set()
+
+
+def test_most_confident_language_wins():
+    best = recognize({"en-US": Hypothesis("hello", 0.6, "en-US"), "hi-IN": Hypothesis("namaste", 0.9, "hi-IN")})
+    assert best.language == "hi-IN"
+
+
+def test_silence_is_none():
+    assert recognize({"en-US": None, "hi-IN": "hang"}) is None
+
+
+def test_deadline_with_no_answer_raises():
+    with pytest.raises(sr.RequestError, match="within"):
+        recognize({"en-US": "hang", "hi-IN": "hang"})
+
+
+def test_errors_and_timeouts_raise_the_error():
+    with pytest.raises(sr.RequestError, match="quota"):
+        recognize({"en-US": sr.RequestError("quota"), "hi-IN": "hang"})
+
+
+def test_partial_failure_keeps_the_answer():
+    best = recognize({"en-US": sr.RequestError("quota"), "hi-IN": Hypothesis("namaste", 0.8, "hi-IN")})
+    assert best.transcript == "namaste"
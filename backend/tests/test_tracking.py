@@ -0,0 +1,106 @@
+import os
+
+import cv2
+import numpy as np
+
+import vision
+from tracking import FaceTracker, TrackerRegistry, box_iou
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "astronaut.jpg")
+
+
+def result(x, y, w=100, h=100, tracked=False):
+    return {"face_detected": True, "tracked": tracked,
+            "face_dimensions": {"x": x, "y": y, "width": w, "height": h}}
+
+
+def test_box_iou():
+    assert box_iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert box_iou((0, 0, 10, 10), (5, 0, 10, 10)) == 50 / 150
+    assert box_iou((0, 0, 10, 10), (20, 20, 10, 10)) == 0.0
+
+
+def test_first_frame_is_a_keyframe_then_region_is_padded():
+    tracker = FaceTracker(keyframe_interval=10, padding=0.5)
+    assert tracker.search_region() is None
+    tracker.update(result(100, 80))
+    assert tracker.search_region() == (50, 30, 250, 230)
+
+
+def test_full_frame_reacquire_every_keyframe_interval():
+    tracker = FaceTracker(keyframe_interval=4)
+    tracker.update(result(100, 100))
+    regions = []
+    for _ in range(8):
+        region = tracker.search_region()
+        regions.append(region is not None)
+        tracker.update(result(100, 100, tracked=region is not None))
+    # Three tracked frames, then a keyframe, repeating
+    assert regions == [True, True, True, False, True, True, True, False]
+
+
+def test_lost_face_falls_back_to_full_frame():
+    tracker = FaceTracker()
+    tracker.update(result(100, 100))
+    tracker.update({"face_detected": False})
+    assert tracker.box is None
+    assert tracker.search_region() is None
+
+
+def test_drift_below_min_iou_falls_back_to_full_frame():
+    tracker = FaceTracker(min_iou=0.3)
+    tracker.update(result(100, 100))
+    tracker.update(result(110, 100, tracked=True))
+    assert tracker.search_region() is not None
+    # Jumped most of a face width inside the padded region: overlap too small to trust
+    tracker.update(result(170, 100, tracked=True))
+    assert tracker.confidence < 0.3
+    assert tracker.search_region() is None
+
+
+def test_registry_evicts_least_recently_used():
+    registry = TrackerRegistry(max_sessions=2)
+    a = registry.get("a")
+    registry.get("b")
+    assert registry.get("a") is a
+    registry.get("c")
+    # "b" was the least recently used
+    assert registry.get("a") is a
+    assert len(registry._trackers) == 2
+    assert "b" not in registry._trackers
+
+
+def test_registry_replaces_idle_trackers():
+    registry = TrackerRegistry(idle_seconds=60)
+    tracker = registry.get("a")
+    tracker.update(result(100, 100))
+    assert registry.get("a") is tracker
+    tracker.last_seen -= 61
+    fresh = registry.get("a")
+    assert fresh is not tracker
+    assert fresh.box is None
+
+
+def test_discard():
+    registry = TrackerRegistry()
+    tracker = registry.get("a")
+    registry.discard("a")
+    assert registry.get("a") is not tracker
+
+
+def test_moving_face_is_tracked_through_analyze_frame():
+    gray = cv2.imread(FIXTURE, cv2.IMREAD_GRAYSCALE)
+    x, y, w, h = vision.find_face(gray)
+    pad = w // 2
+    face = gray[y - pad:y + h + pad, x - pad:x + w + pad]
+    tracker = FaceTracker(keyframe_interval=5)
+    tracked = []
+    for step in range(6):
+        frame = np.full((480, 640), 128, np.uint8)
+        top, left = 100 + 4 * step, 150 + 6 * step
+        frame[top:top + face.shape[0], left:left + face.shape[1]] = face
+        ok, encoded = cv2.imencode(".png", cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR))
+        found = vision.analyze_frame(encoded.tobytes(), tracker)
+        assert found["face_detected"]
+        tracked.append(found["tracked"])
+    assert tracked == [False, True, True, True, True, False]
@@ -0,0 +1,36 @@
+import re
+
+from tts import SentenceSplitter
+
+REPLY = "Hi. I hear you. That sounds hard! What happened at work today? Take your time."
+
+
+def split_streamed(deltas, min_chars=20):
+    splitter = SentenceSplitter(min_chars)
+    sentences = []
+    for delta in deltas:
+        sentences += splitter.feed(delta)
+    rest = splitter.flush()
+    return sentences + ([rest] if rest else [])
+
+
+def test_token_by_token_keeps_spacing():
+    tokens = re.findall(r"\S+\s*", REPLY)
+    assert split_streamed(tokens) == [
+        "Hi. I hear you. That sounds hard!",
+        "What happened at work today?",
+        "Take your time.",
+    ]
+
+
+def test_chunking_does_not_change_sentences():
+    whole = split_streamed([REPLY])
+    assert split_streamed(list(REPLY)) == whole
+    assert split_streamed([REPLY[i:i + 7] for i in range(0, len(REPLY), 7)]) == whole
+
+
+def test_sentence_waits_for_whitespace_after_terminator():
+    splitter = SentenceSplitter(min_chars=5)
+    assert splitter.feed("It costs 3.") == []
+    assert splitter.feed("50 dollars. ") == ["It costs 3.50 dollars."]
+    assert splitter.flush() == ""
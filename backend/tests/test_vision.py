@@ -0,0 +1,93 @@
+import os
+
+import cv2
+import numpy as np
+
+import vision
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "astronaut.jpg")
+
+
+def legacy_counts(face_gray):
+    """Per-rule detection counts from the original one-detectMultiScale-per-rule classifier"""
+    counts = {}
+    for name, rules, cascade in (("smile", vision.SMILE_RULES, vision.cascades.get("smile")),
+                                 ("eye", vision.EYE_RULES, vision.cascades.get("eye"))):
+        for rule, (scale_factor, min_neighbors, min_size) in rules.items():
+            found = cascade.detectMultiScale(face_gray, scaleFactor=scale_factor,
+                                             minNeighbors=min_neighbors, minSize=min_size)
+            counts[name, rule] = len(found)
+    return counts
+
+
+def legacy_label(face_gray):
+    counts = legacy_counts(face_gray)
+    height = face_gray.shape[0]
+    stats = {
+        "brightness": np.mean(face_gray),
+        "upper_brightness": np.mean(face_gray[0:int(height*0.5), :]),
+        "lower_brightness": np.mean(face_gray[int(height*0.5):, :]),
+        "middle_brightness": np.mean(face_gray[int(height*0.3):int(height*0.7), :]),
+        "lower_contrast": np.std(face_gray[int(height*0.66):, :]),
+    }
+    smiles = {rule: counts["smile", rule] for rule in vision.SMILE_RULES}
+    eyes = {rule: counts["eye", rule] for rule in vision.EYE_RULES}
+    return vision.classify_expression(smiles, eyes, stats)[0]
+
+
+def fixture_crops(count=60, seed=0):
+    """The fixture face with jittered borders, plus random crops of the rest of the frame"""
+    gray = cv2.imread(FIXTURE, cv2.IMREAD_GRAYSCALE)
+    x, y, w, h = vision.find_face(gray)
+    rng = np.random.default_rng(seed)
+    crops = [gray[y:y+h, x:x+w]]
+    for i in range(count):
+        if i % 2 == 0:
+            top, bottom, left, right = rng.integers(-15, 16, 4)
+            crops.append(gray[max(y + top, 0):y + h + bottom, max(x + left, 0):x + w + right])
+        else:
+            width, height = rng.integers(30, 160, 2)
+            top, left = rng.integers(0, gray.shape[0] - height), rng.integers(0, gray.shape[1] - width)
+            crops.append(gray[top:top + height, left:left + width])
+    return crops
+
+
+def test_fixture_has_a_face():
+    frame = open(FIXTURE, "rb").read()
+    assert vision.analyze_frame(frame)["face_detected"]
+
+
+def test_labels_match_rule_table():
+    for crop in fixture_crops(seed=1):
+        assert vision.detect_expression_from_face(crop, None)[0] == legacy_label(crop)
+
+
+def test_region_stats_match_per_slice_reductions():
+    for crop in fixture_crops(count=10):
+        height = crop.shape[0]
+        stats = vision.region_stats(crop)
+        assert np.isclose(stats["brightness"], np.mean(crop))
+        assert np.isclose(stats["middle_brightness"], np.mean(crop[int(height*0.3):int(height*0.7), :]))
+        assert np.isclose(stats["lower_contrast"], np.std(crop[int(height*0.66):, :]))
+
+
+class CountingCascade:
+    def __init__(self, cascade):
+        self.cascade = cascade
+        self.calls = 0
+
+    def detectMultiScale(self, *args, **kwargs):
+        self.calls += 1
+        return self.cascade.detectMultiScale(*args, **kwargs)
+
+
+def test_rules_are_swept_only_when_reached():
+    face = fixture_crops(count=0)[0]
+    smile = CountingCascade(vision.cascades.get("smile"))
+    eye = CountingCascade(vision.cascades.get("eye"))
+    smiles = vision.RuleCounts(face, smile, vision.SMILE_RULES)
+    eyes = vision.RuleCounts(face, eye, vision.EYE_RULES)
+    label, _ = vision.classify_expression(smiles, eyes, vision.region_stats(face))
+    assert label == legacy_label(face) == "Happy 😄"
+    # The strong-smile rule decides the label on the first sweep
+    assert (smile.calls, eye.calls) == (1, 0)
@@ -0,0 +1,76 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+import vision
+import vision_pool
+from vision_pool import PoolBusy, VisionPool
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "astronaut.jpg")
+
+
+@pytest.fixture
+def pool():
+    pool = VisionPool(workers=2, queue_size=8, slot_bytes=256 * 1024, batch_wait=10)
+    pool.spawn_workers()
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def frame():
+    with open(FIXTURE, "rb") as f:
+        return f.read()
+
+
+def test_spawn_workers_starts_every_process(pool):
+    pool.wait_for_workers()
+    assert len(pool.executor._processes) == 2
+
+
+def test_batch_larger_than_free_slots_goes_through(pool, frame):
+    # One frame already in flight, and a batch twice the pool's size
+    held = pool._acquire(1)
+    results = asyncio.run(pool.analyze_batch([frame] * 16))
+    pool._release(held)
+    assert len(results) == 16
+    assert all(result["face_detected"] for result in results)
+    assert pool.stats()["in_flight"] == 0
+
+
+def test_batch_rejected_when_no_slot_frees_up(pool, frame):
+    pool.batch_wait = 0.1
+    held = pool._acquire(8)
+    with pytest.raises(PoolBusy):
+        asyncio.run(pool.analyze_batch([frame]))
+    pool._release(held)
+    assert pool.stats()["rejected"] == 1
+
+
+def test_oversized_frame_fails_alone(pool, frame):
+    results = asyncio.run(pool.analyze_batch([frame, b"x" * (pool.slot_bytes + 1), frame]))
+    assert [result["face_detected"] for result in results] == [True, False, True]
+    assert "exceeds VISION_SLOT_BYTES" in results[1]["error"]
+    assert pool.stats()["in_flight"] == 0
+
+
+def test_detection_threads_load_cascades_at_startup(monkeypatch):
+    monkeypatch.setattr(vision_pool, "VISION_WORKERS", 0)
+    monkeypatch.setattr(vision_pool, "VISION_THREADS", 3)
+    vision_pool.start_pool()
+    try:
+        vision_pool.warm_up_threads()
+        barrier = threading.Barrier(3)
+
+        def loaded_names():
+            barrier.wait()
+            return sorted(getattr(vision.cascades._local, "cascades", {}))
+
+        # One check per thread, none of which has analyzed a frame yet
+        names = [future.result() for future in [vision_pool.threads.submit(loaded_names) for _ in range(3)]]
+        assert names == [sorted(vision.CASCADE_FILES)] * 3
+    finally:
+        vision_pool.stop_pool()
+    assert vision_pool.threads is None
@@ -0,0 +1,58 @@
+import time
+from contextlib import contextmanager
+from metrics import stage_seconds, stage_errors
+
+
+class Timeline:
+    """
+    Stage timings for one request.
+
+    Each span records when it started relative to the request and how long it
+    took, so overlapping stages (e.g. memory prefetch during ASR) show up as
+    such and the critical path can be read straight off the log line. Every
+    span is also observed in the avacare_stage_seconds histogram.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans = []
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        record = {"stage": stage, "start_ms": round((start - self.started) * 1000, 1)}
+        try:
+            yield record
+        except BaseException as e:
+            record["error"] = type(e).__name__
+            stage_errors.inc(pipeline=self.name, stage=stage, error=record["error"])
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            record["duration_ms"] = round(elapsed * 1000, 1)
+            self.spans.append(record)
+            stage_seconds.observe(elapsed, pipeline=self.name, stage=stage)
+
+    async def timed(self, stage: str, awaitable):
+        """Await something inside a span (handy for stages started as background tasks)"""
+        with self.span(stage):
+            return await awaitable
+
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+    def summary(self):
+        return {"total_ms": self.total_ms(), "spans": sorted(self.spans, key=lambda span: span["start_ms"])}
+
+    def server_timing(self) -> str:
+        """Spans as a Server-Timing header value (shows up in browser devtools)"""
+        entries = [f"{span['stage']};dur={span['duration_ms']}" for span in self.spans]
+        return ", ".join(entries + [f"total;dur={self.total_ms()}"])
+
+    def log(self, **labels):
+        parts = [f"{key}={value}" for key, value in labels.items()]
+        for span in sorted(self.spans, key=lambda span: span["start_ms"]):
+            status = f"!{span['error']}" if "error" in span else ""
+            parts.append(f"{span['stage']}@{span['start_ms']:.0f}+{span['duration_ms']:.0f}ms{status}")
+        print(f"[Timing] {self.name} total={self.total_ms():.0f}ms " + " ".join(parts))
@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Run a full-frame detection at least every N frames
+KEYFRAME_INTERVAL = int(os.getenv("FACE_KEYFRAME_INTERVAL", "10"))
+# Search area around the last face, as a fraction of its width/height on each side
+TRACK_PADDING = float(os.getenv("FACE_TRACK_PADDING", "0.5"))
+# Overlap with the previous box below which the track is considered lost
+TRACK_MIN_IOU = float(os.getenv("FACE_TRACK_MIN_IOU", "0.3"))
+# Sessions idle for longer than this are forgotten
+TRACKER_IDLE_SECONDS = float(os.getenv("FACE_TRACKER_IDLE_SECONDS", "300"))
+MAX_TRACKERS = int(os.getenv("FACE_MAX_TRACKERS", "1000"))
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+class FaceTracker:
+    """
+    Remembers where the face was in a session's last frame.
+
+    Between keyframes vision.analyze_gray only searches a padded region
+    around the previous face; a keyframe (or a lost track) scans the whole frame.
+    """
+
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL, padding=TRACK_PADDING, min_iou=TRACK_MIN_IOU):
+        self.keyframe_interval = keyframe_interval
+        self.padding = padding
+        self.min_iou = min_iou
+        self.box = None
+        self.confidence = 0.0
+        self.frames_since_keyframe = 0
+        self.last_seen = time.monotonic()
+
+    def search_region(self):
+        """Region (x0, y0, x1, y1) to search in the next frame, or None for a full-frame keyframe"""
+        if self.box is None or self.confidence < self.min_iou:
+            return None
+        if self.frames_since_keyframe + 1 >= self.keyframe_interval:
+            return None
+        x, y, w, h = self.box
+        pad_x, pad_y = int(w * self.padding), int(h * self.padding)
+        return x - pad_x, y - pad_y, x + w + pad_x, y + h + pad_y
+
+    def update(self, result):
+        """Feed back the detection result for the frame searched with search_region()"""
+        self.last_seen = time.monotonic()
+        dims = result.get("face_dimensions")
+        if not result.get("face_detected") or not dims:
+            self.box = None
+            self.confidence = 0.0
+            self.frames_since_keyframe = 0
+            return
+
+        box = (dims["x"], dims["y"], dims["width"], dims["height"])
+        if result.get("tracked"):
+            self.frames_since_keyframe += 1
+            # Tracking confidence is how well the new box lines up with the old one
+            self.confidence = box_iou(self.box, box) if self.box is not None else 0.0
+        else:
+            self.frames_since_keyframe = 0
+            self.confidence = 1.0
+        self.box = box
+
+
+class TrackerRegistry:
+    """Per-session FaceTrackers with LRU + idle eviction"""
+
+    def __init__(self, max_sessions=MAX_TRACKERS, idle_seconds=TRACKER_IDLE_SECONDS):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._trackers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> FaceTracker:
+        with self._lock:
+            tracker = self._trackers.pop(session_id, None)
+            if tracker is None or time.monotonic() - tracker.last_seen > self.idle_seconds:
+                tracker = FaceTracker()
+            self._trackers[session_id] = tracker
+            while len(self._trackers) > self.max_sessions:
+                self._trackers.popitem(last=False)
+            return tracker
+
+    def discard(self, session_id: str):
+        with self._lock:
+            self._trackers.pop(session_id, None)
+
+
+trackers = TrackerRegistry()
@@ -0,0 +1,283 @@
+import asyncio
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from fastapi.concurrency import run_in_threadpool
+from gtts import gTTS
+
+# Sentences being synthesized at the same time for one streamed reply
+TTS_MAX_IN_FLIGHT = int(os.getenv("TTS_MAX_IN_FLIGHT", "3"))
+# Shorter sentences are merged with the next one so clips are not choppy
+MIN_SENTENCE_CHARS = int(os.getenv("TTS_MIN_SENTENCE_CHARS", "20"))
+# Sentence end: ., !, ? or the Devanagari danda, followed by whitespace
+SENTENCE_END = re.compile(r"(?<=[.!?।])\s+")
+
+# gTTS accent (Google Translate top-level domain) used as the "voice"
+TTS_VOICE = os.getenv("TTS_VOICE", "com")
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "avacare_tts"))
+TTS_CACHE_MAX_ENTRIES = int(os.getenv("TTS_CACHE_MAX_ENTRIES", "2000"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# RAM kept for recently generated clips, which are usually fetched right away
+TTS_HOT_SET_BYTES = int(os.getenv("TTS_HOT_SET_BYTES", str(32 * 1024 * 1024)))
+
+# Fixed replies the API sends; synthesized once at startup
+CANNED_PHRASES = [
+    "I am here for you.",
+    "I am here for you. How can I help you today?",
+    "I couldn't detect any speech. Please speak clearly and try again.",
+    "Audio too short. Please speak for at least 1 second.",
+]
+
+CACHE_FILENAME = re.compile(r"^[0-9a-f]{64}\.mp3$")
+
+
+class HotSet:
+    """Byte-bounded LRU of clip contents held in memory"""
+
+    def __init__(self, max_bytes=TTS_HOT_SET_BYTES):
+        self.max_bytes = max_bytes
+        self._clips = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        with self._lock:
+            data = self._clips.get(name)
+            if data is not None:
+                self._clips.move_to_end(name)
+            return data
+
+    def put(self, name: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._clips.pop(name, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._clips[name] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._clips.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def discard(self, name: str):
+        with self._lock:
+            data = self._clips.pop(name, None)
+            if data is not None:
+                self._bytes -= len(data)
+
+    def stats(self):
+        with self._lock:
+            return {"hot_entries": len(self._clips), "hot_bytes": self._bytes, "hot_max_bytes": self.max_bytes}
+
+
+class TTSCache:
+    """
+    Content-addressed store of synthesized clips.
+
+    A clip's filename is the SHA-256 of (text, lang, voice), so the same reply
+    is only synthesized once. Least recently used clips are deleted once the
+    cache holds more than max_entries files or max_bytes on disk. Freshly
+    synthesized clips are also kept in a RAM hot set for their first fetch.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_entries=TTS_CACHE_MAX_ENTRIES, max_bytes=TTS_CACHE_MAX_BYTES,
+                 hot_bytes=TTS_HOT_SET_BYTES):
+        self.directory = directory
+        self.hot = HotSet(hot_bytes)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"synth_hits": 0, "synth_misses": 0, "serve_hits": 0, "serve_misses": 0,
+                         "hot_hits": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        """Pick up clips left by a previous run, oldest first"""
+        found = []
+        for name in os.listdir(self.directory):
+            if CACHE_FILENAME.match(name):
+                stat = os.stat(os.path.join(self.directory, name))
+                found.append((stat.st_mtime, name, stat.st_size))
+        with self._lock:
+            for _, name, size in sorted(found):
+                self._entries[name] = size
+                self._bytes += size
+            self._evict()
+
+    @staticmethod
+    def key(text: str, lang: str, voice: str) -> str:
+        return hashlib.sha256("\0".join((voice, lang, text)).encode("utf-8")).hexdigest()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            name, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.counters["evictions"] += 1
+            self.hot.discard(name)
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def get_or_synthesize(self, text: str, lang: str = "en", voice: str = TTS_VOICE) -> str:
+        """Filename of the clip for text, synthesizing it on a miss (blocking)"""
+        name = f"{self.key(text, lang, voice)}.mp3"
+        with self._lock:
+            if name in self._entries:
+                self._entries.move_to_end(name)
+                self.counters["synth_hits"] += 1
+                return name
+            self.counters["synth_misses"] += 1
+
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=lang, tld=voice, slow=False).write_to_fp(buffer)
+        data = buffer.getvalue()
+        self.hot.put(name, data)
+
+        path = os.path.join(self.directory, name)
+        # Write under a private name and rename, so readers never see a partial file
+        partial = f"{path}.{os.urandom(4).hex()}.part"
+        with open(partial, "wb") as f:
+            f.write(data)
+        os.replace(partial, path)
+
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = len(data)
+                self._bytes += len(data)
+                self._evict()
+        return name
+
+    def __contains__(self, filename: str):
+        """Whether filename is a clip the cache still holds, without reading it"""
+        with self._lock:
+            return bool(CACHE_FILENAME.match(filename)) and filename in self._entries
+
+    def read(self, filename: str):
+        """Contents of a cached clip from RAM or disk, or None if it is unknown or evicted (blocking)"""
+        with self._lock:
+            if not CACHE_FILENAME.match(filename) or filename not in self._entries:
+                self.counters["serve_misses"] += 1
+                return None
+            self._entries.move_to_end(filename)
+            self.counters["serve_hits"] += 1
+        data = self.hot.get(filename)
+        if data is not None:
+            with self._lock:
+                self.counters["hot_hits"] += 1
+            return data
+        try:
+            with open(os.path.join(self.directory, filename), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def warm_up(self, phrases=CANNED_PHRASES, lang: str = "en"):
+        for phrase in phrases:
+            try:
+                self.get_or_synthesize(phrase, lang)
+            except Exception as e:
+                print(f"[TTS] Could not pre-synthesize {phrase!r}: {e}")
+
+    def stats(self):
+        with self._lock:
+            stats = {**self.counters, "entries": len(self._entries), "bytes": self._bytes,
+                     "max_entries": self.max_entries, "max_bytes": self.max_bytes}
+        return {**stats, **self.hot.stats()}
+
+
+tts_cache = TTSCache()
+
+
+def synthesize_speech(text: str, lang: str = "en") -> str:
+    """Cached gTTS rendering of text; returns the /audio URL (blocking on a miss)"""
+    return f"/audio/{tts_cache.get_or_synthesize(text, lang)}"
+
+
+class SentenceSplitter:
+    """Cuts streamed text into complete sentences as soon as each one ends"""
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str):
+        self._buffer += text
+        sentences, start = [], 0
+        for end in SENTENCE_END.finditer(self._buffer):
+            # Short sentences stay in the buffer, with their spacing, and join the next one
+            sentence = self._buffer[start:end.start()].strip()
+            if len(sentence) >= self.min_chars:
+                sentences.append(sentence)
+                start = end.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> str:
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest
+
+
+class SentencePipeline:
+    """
+    Synthesizes a streamed reply sentence by sentence.
+
+    feed() text deltas as they arrive; every finished sentence goes to gTTS
+    right away, with up to max_in_flight syntheses running at once. ready()
+    and drain() hand back the clips strictly in sentence order.
+    """
+
+    def __init__(self, lang: str = "en", max_in_flight: int = TTS_MAX_IN_FLIGHT):
+        self.lang = lang
+        self.splitter = SentenceSplitter()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._tasks = []
+        self._next = 0
+
+    async def _synthesize(self, index: int, sentence: str):
+        async with self._slots:
+            try:
+                audio_url = await run_in_threadpool(synthesize_speech, sentence, self.lang)
+                return {"index": index, "text": sentence, "audio_url": audio_url}
+            except Exception as e:
+                return {"index": index, "text": sentence, "error": str(e)}
+
+    def _start(self, sentence: str):
+        self._tasks.append(asyncio.create_task(self._synthesize(len(self._tasks), sentence)))
+
+    def feed(self, text: str):
+        for sentence in self.splitter.feed(text):
+            self._start(sentence)
+
+    def close(self):
+        """No more text is coming; synthesize whatever is left"""
+        rest = self.splitter.flush()
+        if rest:
+            self._start(rest)
+
+    def ready(self):
+        """Segments that are done and next in order, without waiting"""
+        segments = []
+        while self._next < len(self._tasks) and self._tasks[self._next].done():
+            segments.append(self._tasks[self._next].result())
+            self._next += 1
+        return segments
+
+    async def drain(self):
+        """Wait for the remaining segments, yielding them in order"""
+        while self._next < len(self._tasks):
+            segment = await self._tasks[self._next]
+            self._next += 1
+            yield segment
+
+    def cancel(self):
+        for task in self._tasks[self._next:]:
+            task.cancel()
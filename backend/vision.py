@@ -0,0 +1,274 @@
+import os
+import threading
+import cv2
+import numpy as np
+
+# Haar cascades used by the face/expression detector
+CASCADE_FILES = {
+    "face": "haarcascade_frontalface_default.xml",
+    "eye": "haarcascade_eye.xml",
+    "smile": "haarcascade_smile.xml",
+}
+
+# Full-frame face detection runs on frames shrunk by this factor (1.0 = off)
+FACE_DETECT_DOWNSCALE = float(os.getenv("FACE_DETECT_DOWNSCALE", "1.0"))
+FACE_MIN_SIZE = 50
+
+NO_FACE_RESULT = {"face_detected": False, "expression": "Neutral 😊", "confidence": 0.0, "color": [200, 200, 200]}
+
+
+class CascadeRegistry:
+    """Parses each cascade XML once per thread and reuses the classifier.
+
+    CascadeClassifier keeps scratch buffers inside the instance, so sharing one
+    across the threadpool is not safe; every worker thread gets its own copy.
+    """
+
+    def __init__(self, files=CASCADE_FILES):
+        self._paths = {name: cv2.data.haarcascades + filename for name, filename in files.items()}
+        self._local = threading.local()
+
+    def get(self, name: str):
+        cascades = getattr(self._local, "cascades", None)
+        if cascades is None:
+            cascades = self._local.cascades = {}
+        cascade = cascades.get(name)
+        if cascade is None:
+            cascade = cv2.CascadeClassifier(self._paths[name])
+            if cascade.empty():
+                raise RuntimeError(f"Could not load cascade {self._paths[name]}")
+            cascades[name] = cascade
+        return cascade
+
+    def warm_up(self):
+        """Load every cascade on the calling thread (fails fast on a broken install)"""
+        for name in self._paths:
+            self.get(name)
+
+
+cascades = CascadeRegistry()
+
+
+# (scaleFactor, minNeighbors, minSize) of each rule's detectMultiScale sweep
+SMILE_RULES = {
+    "high": (1.5, 12, (20, 20)),
+    "medium": (1.3, 8, (15, 15)),
+    "low": (1.2, 5, (10, 10)),
+}
+EYE_RULES = {
+    "strict": (1.1, 15, (15, 15)),
+    "loose": (1.2, 8, (10, 10)),
+}
+
+
+class RuleCounts:
+    """Rule name -> detection count, swept on first lookup so rules a face never reaches cost nothing"""
+
+    def __init__(self, face_gray, cascade, rules):
+        self.face_gray = face_gray
+        self.cascade = cascade
+        self.rules = rules
+        self._counts = {}
+
+    def __getitem__(self, name):
+        if name not in self._counts:
+            scale_factor, min_neighbors, min_size = self.rules[name]
+            found = self.cascade.detectMultiScale(self.face_gray, scaleFactor=scale_factor,
+                                                  minNeighbors=min_neighbors, minSize=min_size)
+            self._counts[name] = len(found)
+        return self._counts[name]
+
+
+def region_stats(face_gray):
+    """Brightness/contrast of the face bands from a single pass over the rows"""
+    height, width = face_gray.shape
+    pixels = face_gray.astype(np.float64)
+    # Prefix sums over per-row totals make any horizontal band O(1)
+    row_sum = np.concatenate(([0.0], np.cumsum(pixels.sum(axis=1))))
+    row_sq = np.concatenate(([0.0], np.cumsum(np.einsum("ij,ij->i", pixels, pixels))))
+
+    def band(start, stop):
+        count = (stop - start) * width
+        mean = (row_sum[stop] - row_sum[start]) / count
+        var = (row_sq[stop] - row_sq[start]) / count - mean * mean
+        return mean, np.sqrt(max(var, 0.0))
+
+    brightness, _ = band(0, height)
+    upper_brightness, _ = band(0, int(height*0.5))
+    lower_brightness, _ = band(int(height*0.5), height)
+    middle_brightness, _ = band(int(height*0.3), int(height*0.7))
+    _, lower_contrast = band(int(height*0.66), height)
+    return {
+        "brightness": brightness,
+        "upper_brightness": upper_brightness,
+        "lower_brightness": lower_brightness,
+        "middle_brightness": middle_brightness,
+        "lower_contrast": lower_contrast,
+    }
+
+
+def classify_expression(smiles, eyes, stats):
+    """Rule table mapping detection counts and band statistics to a label"""
+    # Counts are read in rule order, so lazy ones are only computed when a rule needs them
+    if smiles["high"] > 0: return "Happy 😄", (0, 255, 0)
+    if smiles["medium"] > 0: return "Happy 😄", (0, 255, 0)
+
+    num_eyes = eyes["strict"]
+    has_weak_smile = smiles["low"] > 0
+    brightness = stats["brightness"]
+    upper_brightness = stats["upper_brightness"]
+
+    if smiles["low"] > 0 and num_eyes >= 1: return "Content 😊", (50, 255, 100)
+    if num_eyes < 2 and eyes["loose"] >= 1: return "Sleepy 😴", (150, 150, 255)
+    if num_eyes == 0: return "Surprised 😮", (255, 200, 0)
+
+    if num_eyes >= 2:
+        if upper_brightness < stats["lower_brightness"] - 15: return "Thinking 🤔", (255, 150, 50)
+        if brightness < 75 or (upper_brightness < stats["middle_brightness"] - 12): return "Serious 😐", (255, 100, 100)
+        if stats["lower_contrast"] < 35 and 80 <= brightness <= 100: return "Sad 😢", (100, 100, 255)
+        if brightness < 85 and not has_weak_smile: return "Sad 😢", (100, 100, 255)
+        return "Neutral 😊", (200, 200, 200)
+
+    return "Neutral 😊", (200, 200, 200)
+
+
+def detect_expression_from_face(face_gray, face_color):
+    """
+    Expression detection with cascade sweeps run on demand.
+
+    classify_expression reads the counts in rule order, so a face that
+    matches an early rule (a strong smile) skips the remaining sweeps.
+    """
+    smiles = RuleCounts(face_gray, cascades.get("smile"), SMILE_RULES)
+    eyes = RuleCounts(face_gray, cascades.get("eye"), EYE_RULES)
+    return classify_expression(smiles, eyes, region_stats(face_gray))
+
+
+def find_face(gray, region=None, downscale=1.0):
+    """
+    Locate the first face in gray, optionally restricted to region (x0, y0, x1, y1)
+    and/or on a downscaled copy. Returns (x, y, w, h) in frame coordinates or None.
+    """
+    offset_x = offset_y = 0
+    image = gray
+    if region is not None:
+        x0, y0, x1, y1 = region
+        x0, y0 = max(int(x0), 0), max(int(y0), 0)
+        x1, y1 = min(int(x1), gray.shape[1]), min(int(y1), gray.shape[0])
+        if x1 - x0 < FACE_MIN_SIZE or y1 - y0 < FACE_MIN_SIZE:
+            return None
+        image = gray[y0:y1, x0:x1]
+        offset_x, offset_y = x0, y0
+
+    face_cascade = cascades.get("face")
+    min_size = FACE_MIN_SIZE
+    if downscale > 1.0:
+        height, width = image.shape
+        image = cv2.resize(image, (int(width / downscale), int(height / downscale)), interpolation=cv2.INTER_AREA)
+        min_size = max(int(FACE_MIN_SIZE / downscale), max(face_cascade.getOriginalWindowSize()))
+
+    faces = face_cascade.detectMultiScale(image, scaleFactor=1.1, minNeighbors=5, minSize=(min_size, min_size))
+    if len(faces) == 0:
+        return None
+
+    x, y, w, h = faces[0]
+    if downscale > 1.0:
+        x, y, w, h = (int(round(v * downscale)) for v in (x, y, w, h))
+    return x + offset_x, y + offset_y, w, h
+
+
+def analyze_gray(gray, frame=None, region=None):
+    """
+    Face + expression detection on an already decoded grayscale frame.
+
+    With a region (from a FaceTracker) only that part of the frame is searched;
+    if the face is not found there the full frame is scanned instead.
+    """
+    box = find_face(gray, region) if region is not None else None
+    tracked = box is not None
+    if box is None:
+        box = find_face(gray, downscale=FACE_DETECT_DOWNSCALE)
+
+    if box is None: return dict(NO_FACE_RESULT)
+
+    x, y, w, h = box
+    face_gray = gray[y:y+h, x:x+w]
+    face_color = frame[y:y+h, x:x+w] if frame is not None else None
+
+    expression_with_emoji, color_bgr = detect_expression_from_face(face_gray, face_color)
+    confidence = min((w * h) / (gray.shape[0] * gray.shape[1]) * 5, 1.0)
+
+    return {
+        "face_detected": True,
+        "expression": expression_with_emoji,
+        "confidence": round(confidence, 2),
+        "color": [color_bgr[2], color_bgr[1], color_bgr[0]],
+        "face_dimensions": {"x": int(x), "y": int(y), "width": int(w), "height": int(h)},
+        "tracked": tracked
+    }
+
+
+def decode_frame(image_data):
+    """Decode an encoded frame (bytes or uint8 buffer) into (frame, gray), or (None, None)"""
+    nparr = np.frombuffer(image_data, np.uint8)
+    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if frame is None: return None, None
+    return frame, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def analyze_frame(image_data: bytes, tracker=None):
+    """Decode an encoded frame and run face + expression detection (blocking)"""
+    frame, gray = decode_frame(image_data)
+    if frame is None: return dict(NO_FACE_RESULT)
+
+    if tracker is None:
+        return analyze_gray(gray, frame)
+    result = analyze_gray(gray, frame, tracker.search_region())
+    tracker.update(result)
+    return result
+
+
+def decode_batch(blobs):
+    """
+    Decode encoded frames into one preallocated (N, H, W) grayscale buffer.
+
+    Returns (frames, grays) where grays[i] is a view into the shared buffer,
+    or None for frames that failed to decode.
+    """
+    frames = [cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR) for data in blobs]
+    shapes = [frame.shape[:2] for frame in frames if frame is not None]
+    if not shapes:
+        return frames, [None] * len(frames)
+
+    height = max(h for h, _ in shapes)
+    width = max(w for _, w in shapes)
+    batch = np.empty((len(frames), height, width), dtype=np.uint8)
+
+    grays = []
+    for i, frame in enumerate(frames):
+        if frame is None:
+            grays.append(None)
+            continue
+        h, w = frame.shape[:2]
+        if (h, w) == (height, width):
+            # Same-size frames (the usual webcam case) convert straight into the buffer
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=batch[i])
+        else:
+            batch[i, :h, :w] = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        grays.append(batch[i, :h, :w])
+    return frames, grays
+
+
+def analyze_batch(blobs):
+    """Run detection over a batch of encoded frames, one result per frame (blocking)"""
+    frames, grays = decode_batch(blobs)
+    results = []
+    for frame, gray in zip(frames, grays):
+        if gray is None:
+            results.append(dict(NO_FACE_RESULT))
+            continue
+        try:
+            results.append(analyze_gray(gray, frame))
+        except Exception as e:
+            results.append({"face_detected": False, "error": str(e)})
+    return results
@@ -0,0 +1,286 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+from fastapi.concurrency import run_in_threadpool
+import numpy as np
+import vision
+
+# Number of vision worker processes (0 = run detection on threads in the API process)
+VISION_WORKERS = int(os.getenv("VISION_WORKERS", "0"))
+# Detection threads in the API process when there are no worker processes
+VISION_THREADS = int(os.getenv("VISION_THREADS", str(min(4, os.cpu_count() or 1))))
+# Frames that may be queued or in flight at once; further frames are rejected
+VISION_QUEUE_SIZE = int(os.getenv("VISION_QUEUE_SIZE", "0")) or max(VISION_WORKERS, 1) * 4
+# Largest encoded frame a shared-memory slot can hold
+VISION_SLOT_BYTES = int(os.getenv("VISION_SLOT_BYTES", str(2 * 1024 * 1024)))
+# How long a batch waits for a slot to free up before it is rejected
+VISION_BATCH_WAIT_SECONDS = float(os.getenv("VISION_BATCH_WAIT_SECONDS", "2.0"))
+# Poll interval while a batch waits for slots
+SLOT_POLL_SECONDS = 0.005
+
+
+class PoolBusy(Exception):
+    """Every shared-memory frame slot is taken"""
+
+
+# Worker-process side
+
+_worker_shm = None
+
+
+def _init_worker(shm_name: str):
+    global _worker_shm
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    vision.cascades.warm_up()
+
+
+def _worker_pid():
+    # Runs after _init_worker, so a finished call means the worker has its cascades loaded
+    return os.getpid()
+
+
+def _slot_view(offset: int, length: int):
+    return np.ndarray((length,), dtype=np.uint8, buffer=_worker_shm.buf, offset=offset)
+
+
+def _run_frame(offset: int, length: int, region):
+    start = time.perf_counter()
+    frame, gray = vision.decode_frame(_slot_view(offset, length))
+    if frame is None:
+        result = dict(vision.NO_FACE_RESULT)
+    else:
+        result = vision.analyze_gray(gray, frame, region)
+    return result, os.getpid(), time.perf_counter() - start
+
+
+def _run_batch(slices):
+    start = time.perf_counter()
+    results = vision.analyze_batch([_slot_view(offset, length) for offset, length in slices])
+    return results, os.getpid(), time.perf_counter() - start
+
+
+# API-process side
+
+class VisionPool:
+    """
+    Process pool for CPU-bound frame analysis.
+
+    Encoded frames are copied into fixed-size slots of one shared-memory block
+    and workers decode them in place, so only slot offsets cross the process
+    boundary. A frame that finds no free slot raises PoolBusy.
+    """
+
+    def __init__(self, workers=VISION_WORKERS, queue_size=VISION_QUEUE_SIZE, slot_bytes=VISION_SLOT_BYTES,
+                 batch_wait=VISION_BATCH_WAIT_SECONDS):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.slot_bytes = slot_bytes
+        self.batch_wait = batch_wait
+        self.shm = shared_memory.SharedMemory(create=True, size=queue_size * slot_bytes)
+        self._free = list(range(queue_size))
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.worker_stats = {}
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.shm.name,),
+        )
+        self._spawned = []
+
+    def spawn_workers(self):
+        """Start every worker now (the executor would otherwise start them on first use)"""
+        # Each submit with no idle worker starts one more process
+        self._spawned = [self.executor.submit(_worker_pid) for _ in range(self.workers)]
+
+    def wait_for_workers(self):
+        """Block until the workers from spawn_workers() have loaded their cascades"""
+        for future in self._spawned:
+            future.result()
+
+    def _acquire(self, count: int):
+        with self._lock:
+            if len(self._free) < count:
+                self.rejected += 1
+                raise PoolBusy(f"All {self.queue_size} vision slots are busy")
+            return [self._free.pop() for _ in range(count)]
+
+    async def _acquire_some(self, count: int):
+        """Up to count free slots, at least one; waits up to batch_wait for one to free up"""
+        deadline = time.monotonic() + self.batch_wait
+        while True:
+            with self._lock:
+                if self._free:
+                    return [self._free.pop() for _ in range(min(count, len(self._free)))]
+                if time.monotonic() >= deadline:
+                    self.rejected += 1
+                    raise PoolBusy(f"All {self.queue_size} vision slots stayed busy for {self.batch_wait} s")
+            await asyncio.sleep(SLOT_POLL_SECONDS)
+
+    def _release(self, slots):
+        with self._lock:
+            self._free.extend(slots)
+
+    def _write(self, slot: int, data: bytes):
+        offset = slot * self.slot_bytes
+        self.shm.buf[offset:offset + len(data)] = data
+        return offset, len(data)
+
+    def _record(self, pid: int, elapsed: float, frames: int):
+        with self._lock:
+            stats = self.worker_stats.setdefault(pid, {"frames": 0, "jobs": 0, "busy_seconds": 0.0})
+            stats["frames"] += frames
+            stats["jobs"] += 1
+            stats["busy_seconds"] += elapsed
+            stats["last_job_ms"] = round(elapsed * 1000, 2)
+
+    def _too_big(self, data: bytes):
+        return f"Frame of {len(data)} bytes exceeds VISION_SLOT_BYTES"
+
+    def _check_sizes(self, blobs):
+        for data in blobs:
+            if len(data) > self.slot_bytes:
+                raise ValueError(self._too_big(data))
+
+    async def _run(self, slots, blobs, make_job):
+        """Copy blobs into the given slots and run make_job(slices) -> (fn, *args) in a worker"""
+        try:
+            slices = [self._write(slot, data) for slot, data in zip(slots, blobs)]
+            future = self.executor.submit(*make_job(slices))
+        except BaseException:
+            self._release(slots)
+            raise
+        # Slots are only reusable once the worker is done reading them, even if the caller goes away
+        future.add_done_callback(lambda _: self._release(slots))
+        result, pid, elapsed = await asyncio.wrap_future(future)
+        self._record(pid, elapsed, len(blobs))
+        return result
+
+    async def _submit(self, blobs, make_job):
+        """Run blobs as one job, or raise PoolBusy if there are not enough free slots right now"""
+        self._check_sizes(blobs)
+        return await self._run(self._acquire(len(blobs)), blobs, make_job)
+
+    async def analyze(self, image_data: bytes, tracker=None):
+        region = tracker.search_region() if tracker is not None else None
+        result = await self._submit([image_data], lambda slices: (_run_frame, *slices[0], region))
+        if tracker is not None:
+            tracker.update(result)
+        return result
+
+    async def analyze_batch(self, blobs):
+        """
+        Send the frames out in chunks sized to the slots free at the time.
+
+        A chunk goes to a worker as soon as it has slots, and the next chunk
+        waits for more to free up, so a batch larger than the pool or one
+        arriving while other frames are in flight still goes through. A frame
+        too big for a slot gets an error entry instead of failing the batch.
+        """
+        fits = [len(data) <= self.slot_bytes for data in blobs]
+        analyzed = iter(await self._analyze_chunks([data for data, ok in zip(blobs, fits) if ok]))
+        return [next(analyzed) if ok else {"face_detected": False, "error": self._too_big(data)}
+                for data, ok in zip(blobs, fits)]
+
+    async def _analyze_chunks(self, blobs):
+        jobs = []
+        try:
+            start = 0
+            while start < len(blobs):
+                slots = await self._acquire_some(len(blobs) - start)
+                chunk = blobs[start:start + len(slots)]
+                jobs.append(asyncio.ensure_future(self._run(slots, chunk, lambda slices: (_run_batch, slices))))
+                start += len(slots)
+            chunks = await asyncio.gather(*jobs)
+        except BaseException:
+            for job in jobs:
+                job.cancel()
+            raise
+        return [result for chunk in chunks for result in chunk]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "slots": self.queue_size,
+                "in_flight": self.queue_size - len(self._free),
+                "rejected": self.rejected,
+                "per_worker": {str(pid): dict(stats) for pid, stats in self.worker_stats.items()},
+            }
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.shm.close()
+        self.shm.unlink()
+
+
+pool = None
+# Fixed set of detection threads used without worker processes; each loads its cascades when it starts
+threads = None
+
+
+def _warm_thread(barrier):
+    # Holding every task until all have started puts one on each thread
+    barrier.wait()
+
+
+def start_pool():
+    global pool, threads
+    if VISION_WORKERS > 0 and pool is None:
+        pool = VisionPool()
+        pool.spawn_workers()
+    elif VISION_WORKERS <= 0 and threads is None:
+        threads = ThreadPoolExecutor(max_workers=VISION_THREADS, thread_name_prefix="vision",
+                                     initializer=vision.cascades.warm_up)
+    return pool
+
+
+def warm_up_threads():
+    """Readiness check: start every detection thread, which loads its own cascades (no-op with workers)"""
+    if threads is None:
+        return
+    barrier = threading.Barrier(VISION_THREADS)
+    for future in [threads.submit(_warm_thread, barrier) for _ in range(VISION_THREADS)]:
+        future.result()
+
+
+def wait_for_workers():
+    """Readiness check: every worker process is up with its cascades loaded"""
+    if pool is not None:
+        pool.wait_for_workers()
+
+
+def stop_pool():
+    global pool, threads
+    if pool is not None:
+        pool.close()
+        pool = None
+    if threads is not None:
+        threads.shutdown(wait=True, cancel_futures=True)
+        threads = None
+
+
+async def _run_on_thread(fn, *args):
+    if threads is None:
+        # start_pool() was not called (scripts, tests): the shared threadpool still works
+        return await run_in_threadpool(fn, *args)
+    return await asyncio.get_running_loop().run_in_executor(threads, fn, *args)
+
+
+async def analyze_frame_async(image_data: bytes, tracker=None):
+    """Run vision.analyze_frame in the worker pool, or on the detection threads when no pool is running"""
+    if pool is None:
+        return await _run_on_thread(vision.analyze_frame, image_data, tracker)
+    return await pool.analyze(image_data, tracker)
+
+
+async def analyze_batch_async(blobs):
+    if pool is None:
+        return await _run_on_thread(vision.analyze_batch, blobs)
+    return await pool.analyze_batch(blobs)
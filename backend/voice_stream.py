@@ -0,0 +1,89 @@
+import os
+import numpy as np
+import speech_recognition as sr
+from audio_pipeline import SAMPLE_RATE, SAMPLE_WIDTH, MIN_DURATION_SECONDS, INT16_FULL_SCALE, normalize
+
+# Streamed audio is raw 16 kHz mono little-endian PCM16, analysed in 30 ms frames
+FRAME_MS = 30
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+# Frames louder than this count as speech
+VAD_THRESHOLD_DBFS = float(os.getenv("VAD_THRESHOLD_DBFS", "-45"))
+# Trailing silence that ends an utterance (same as the old recognizer pause_threshold)
+END_OF_SPEECH_MS = int(os.getenv("VAD_END_OF_SPEECH_MS", "800"))
+# Audio kept from just before speech starts so the first syllable is not clipped
+PRE_ROLL_MS = 300
+# How much new speech accumulates between partial transcripts
+PARTIAL_INTERVAL_MS = int(os.getenv("VOICE_PARTIAL_INTERVAL_MS", "1000"))
+MAX_UTTERANCE_SECONDS = float(os.getenv("VOICE_MAX_UTTERANCE_SECONDS", "30"))
+
+
+class UtteranceSegmenter:
+    """
+    Energy-based voice activity detection over a stream of PCM chunks.
+
+    feed() returns "partial" when enough new speech arrived for a partial
+    transcript, "final" once END_OF_SPEECH_MS of silence follows speech (or the
+    utterance hits MAX_UTTERANCE_SECONDS), otherwise None.
+    """
+
+    def __init__(self):
+        self.threshold = INT16_FULL_SCALE * 10 ** (VAD_THRESHOLD_DBFS / 20)
+        self._pending = b""
+        self._pre_roll = []
+        self._frames = []
+        self.reset()
+
+    def reset(self):
+        self._frames = []
+        self.in_speech = False
+        self.speech_ms = 0
+        self.silence_ms = 0
+        self._since_partial_ms = 0
+
+    def feed(self, chunk: bytes):
+        data = self._pending + chunk
+        usable = len(data) - len(data) % (FRAME_SAMPLES * SAMPLE_WIDTH)
+        self._pending = data[usable:]
+        if not usable:
+            return None
+
+        frames = np.frombuffer(data[:usable], dtype=np.int16).reshape(-1, FRAME_SAMPLES)
+        as_float = frames.astype(np.float64)
+        voiced = np.sqrt(np.einsum("ij,ij->i", as_float, as_float) / FRAME_SAMPLES) > self.threshold
+
+        event = None
+        for i, (frame, is_voiced) in enumerate(zip(frames, voiced)):
+            if not self.in_speech:
+                if not is_voiced:
+                    self._pre_roll.append(frame)
+                    del self._pre_roll[:-(PRE_ROLL_MS // FRAME_MS)]
+                    continue
+                self.in_speech = True
+                self._frames = self._pre_roll
+                self._pre_roll = []
+
+            self._frames.append(frame)
+            if is_voiced:
+                self.speech_ms += FRAME_MS
+                self._since_partial_ms += FRAME_MS
+                self.silence_ms = 0
+            else:
+                self.silence_ms += FRAME_MS
+
+            duration_ms = len(self._frames) * FRAME_MS
+            if self.silence_ms >= END_OF_SPEECH_MS or duration_ms >= MAX_UTTERANCE_SECONDS * 1000:
+                # Frames after the end belong to the next utterance
+                self._pending = frames[i + 1:].tobytes() + self._pending
+                return "final"
+            if self._since_partial_ms >= PARTIAL_INTERVAL_MS:
+                self._since_partial_ms = 0
+                event = "partial"
+        return event
+
+    def has_enough_speech(self) -> bool:
+        return self.speech_ms >= MIN_DURATION_SECONDS * 1000
+
+    def utterance(self) -> sr.AudioData:
+        """Normalized AudioData for the speech collected so far"""
+        samples = np.concatenate(self._frames) if self._frames else np.zeros(0, dtype=np.int16)
+        return sr.AudioData(normalize(samples).tobytes(), SAMPLE_RATE, SAMPLE_WIDTH)